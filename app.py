@@ -1,5 +1,9 @@
 import streamlit as st
 
+from utils.cache import CACHE
+from utils.datasets import dataset_selector
+from utils.warmup import start_warmup, warmup_status
+
 # ==================================================
 # PAGE SETUP
 # ==================================================
@@ -10,6 +14,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+dataset = dataset_selector()
+
+# Start loading data in the background while the user reads the landing page
+start_warmup(dataset)
+
 # ==================================================
 # SIDEBAR
 # ==================================================
@@ -62,6 +71,7 @@ with col2:
 st.divider()
 
 st.markdown("#### 👈 Use the sidebar to navigate")
+warmup_status(dataset)
 st.markdown("""
 | Page | Description |
 |------|-------------|
@@ -69,4 +79,13 @@ st.markdown("""
 | 🗺️ Geospatial | Maps for hubs, stores, and coverage |
 | ⏱️ Delivery Times | Delivery lifecycle time analysis |
 | 💳 Revenue | Revenue by channel, segment, and payment method |
-""")
\ No newline at end of file
+| 🚴 Drivers | Speed, throughput, and utilisation by driver and vehicle |
+| 🚨 Alerts | Cycle-time anomalies and SLA breaches by hub and hour |
+""")
+
+with st.expander("Cache status"):
+    st.caption(
+        f"{CACHE.nbytes / 1e6:,.0f} MB of {CACHE.max_bytes / 1e6:,.0f} MB budget in use "
+        "· shared by every dataset and session"
+    )
+    st.dataframe(CACHE.summary(), use_container_width=True, hide_index=True)
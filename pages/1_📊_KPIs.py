@@ -1,20 +1,22 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
 # Allow importing utils from the project root (from inside /pages)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_loader import load_full_dataset, load_orders
+from utils.aggregations import AGGREGATES, with_month_date
+from utils.data_loader import load_aggregate, load_full_dataset, load_sketch_cube
+from utils.datasets import dataset_selector
+from utils.sketches import count_distinct, count_distinct_by
 
 st.set_page_config(page_title="KPIs", page_icon="📊", layout="wide")
+dataset_selector()
 st.title("📊 Marketplace KPIs")
 
 # Load data
 df = load_full_dataset()
-orders = load_orders()
+cube = load_sketch_cube()
 
 # ============================================
 # SIDEBAR FILTERS
@@ -34,8 +36,14 @@ with st.sidebar:
     segments = ["All"] + sorted(df["store_segment"].dropna().unique().tolist())
     segment_sel = st.selectbox("Segment", segments)
 
+    st.divider()
+    exact = st.toggle(
+        "Exact distinct counts",
+        help="Count uniques on the filtered data instead of merging HyperLogLog sketches (~1% error)."
+    )
+
 # Apply filters
-df_filtered = df.copy()
+df_filtered = df
 if city_sel != "All":
     df_filtered = df_filtered[df_filtered["hub_city"] == city_sel]
 if channel_sel != "All":
@@ -43,6 +51,36 @@ if channel_sel != "All":
 if segment_sel != "All":
     df_filtered = df_filtered[df_filtered["store_segment"] == segment_sel]
 
+# Same selection expressed as sketch-cube filters
+filters = {
+    dim: sel for dim, sel in (
+        ("hub_city", city_sel), ("channel_name", channel_sel), ("store_segment", segment_sel)
+    ) if sel != "All"
+}
+
+def kpi_table(name):
+    """Precomputed/cached table when unfiltered, computed on the filtered rows otherwise."""
+    return AGGREGATES[name](df_filtered) if filters else load_aggregate(name)
+
+overview = kpi_table("kpi_overview").iloc[0]
+
+# Distinct counts: exact (precomputed) without filters or in exact mode,
+# merged from the sketches for filtered views otherwise
+approximate = bool(filters) and not exact
+ID_COLUMNS = ("order_id", "store_id", "hub_id")
+if approximate or exact:
+    sketched = {col: count_distinct(cube, col, **filters) for col in ID_COLUMNS}
+if approximate:
+    distinct = sketched
+else:
+    distinct = kpi_table("kpi_distinct_counts").iloc[0].to_dict()
+
+SKETCH_HELP = "Estimated from HyperLogLog sketches (~1% error). Turn on exact distinct counts for exact values."
+
+def count_metric(label, col):
+    prefix = "≈ " if approximate else ""
+    st.metric(label, f"{prefix}{int(distinct[col]):,}", help=SKETCH_HELP if approximate else None)
+
 # ============================================
 # KEY METRICS (KPI CARDS)
 # ============================================
@@ -51,17 +89,22 @@ st.markdown("### Overview")
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
-    st.metric("Total Orders", f"{df_filtered['order_id'].nunique():,}")
+    count_metric("Total Orders", "order_id")
 with col2:
-    st.metric("Active Stores", f"{df_filtered['store_id'].nunique():,}")
+    count_metric("Active Stores", "store_id")
 with col3:
-    st.metric("Hubs", f"{df_filtered['hub_id'].nunique():,}")
+    count_metric("Hubs", "hub_id")
 with col4:
-    avg_amount = df_filtered["order_amount"].mean()
-    st.metric("Avg Ticket", f"R$ {avg_amount:,.2f}")
+    st.metric("Avg Ticket", f"R$ {overview['avg_amount']:,.2f}")
 with col5:
-    avg_cycle = df_filtered["order_metric_cycle_time"].mean()
-    st.metric("Avg Cycle Time", f"{avg_cycle:,.0f} min")
+    st.metric("Avg Cycle Time", f"{overview['avg_cycle_time']:,.0f} min")
+
+if exact:
+    errors = " · ".join(
+        f"{col}: {(sketched[col] - n) / n * 100:+.2f}%" if n else f"{col}: n/a"
+        for col, n in distinct.items()
+    )
+    st.caption(f"Sketch error vs exact — {errors}")
 
 st.divider()
 
@@ -76,22 +119,17 @@ with col1:
     st.markdown("#### Orders by month")
 
     # Group by year-month
-    orders_time = (
-    df_filtered.groupby(['order_created_year', 'order_created_month'])['order_id']
-    .nunique()
-    .reset_index(name='total_orders')
-    )
-    
-
-    orders_time["date"] = pd.to_datetime(
-        orders_time["order_created_year"].astype(str)
-        + "-"
-        + orders_time["order_created_month"].astype(str).str.zfill(2)
-        + "-01"
-    )
+    if approximate:
+        month_keys = ['order_created_year', 'order_created_month']
+        orders_time = with_month_date(
+            count_distinct_by(cube, 'order_id', by=month_keys, **filters).reset_index(name='total_orders')
+        )
+        st.caption("≈ Estimated from HyperLogLog sketches (~1% error)")
+    else:
+        orders_time = kpi_table("kpi_orders_by_month")
 
     fig = px.line(
-        orders_time.sort_values("date"),
+        orders_time,
         x="date",
         y="total_orders",
         markers=True
@@ -106,8 +144,7 @@ with col1:
 
 with col2:
     st.markdown("#### Order status")
-    status_counts = df_filtered["order_status"].value_counts().reset_index()
-    status_counts.columns = ["status", "count"]
+    status_counts = kpi_table("kpi_order_status")
 
     fig = px.pie(
         status_counts,
@@ -123,12 +160,7 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("#### Top 10 cities by order volume")
-    top_cities = (
-        df_filtered.groupby("hub_city")
-        .size()
-        .nlargest(10)
-        .reset_index(name="orders")
-    )
+    top_cities = kpi_table("kpi_top_cities")
 
     fig = px.bar(
         top_cities,
@@ -151,10 +183,10 @@ with col1:
 
 with col2:
     st.markdown("#### Order volume by channel")
-    channel_data = df_filtered.groupby("channel_name").size().reset_index(name="orders")
+    channel_data = kpi_table("kpi_channel_volume")
 
     fig = px.bar(
-        channel_data.sort_values("orders", ascending=False),
+        channel_data,
         x="channel_name",
         y="orders",
         color="channel_name",
@@ -172,21 +204,8 @@ with col2:
 # Row 3: Heatmap of orders by hour and weekday
 st.markdown("#### Heatmap: Orders by hour of day and day of week")
 
-# Create day-of-week column
-df_filtered["day_of_week"] = df_filtered["order_moment_created"].dt.day_name()
-heatmap_data = (
-    df_filtered.groupby(["day_of_week", "order_created_hour"])
-    .size()
-    .reset_index(name="orders")
-)
-
-# Pivot to matrix format
-day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-heatmap_pivot = (
-    heatmap_data.pivot(index="day_of_week", columns="order_created_hour", values="orders")
-    .reindex(day_order)
-    .fillna(0)
-)
+# Weekday × hour matrix
+heatmap_pivot = kpi_table("kpi_orders_heatmap")
 
 fig = px.imshow(
     heatmap_pivot,
@@ -6,14 +6,15 @@ import plotly.express as px
 import sys, os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_loader import load_hubs, load_stores, load_full_dataset
+from utils.data_loader import load_hubs, load_stores, load_aggregate
+from utils.datasets import dataset_selector
 
 st.set_page_config(page_title="Geospatial", page_icon="🗺️", layout="wide")
+dataset_selector()
 st.title("🗺️ Geospatial Analysis")
 
 hubs = load_hubs()
 stores = load_stores()
-df = load_full_dataset()
 
 # ============================================
 # HUB MAP
@@ -26,11 +27,13 @@ center_lon = hubs["hub_longitude"].mean()
 
 m = folium.Map(location=[center_lat, center_lon], zoom_start=5, tiles="CartoDB positron")
 
+# Orders per hub, computed once instead of filtering the dataset per marker
+orders_by_hub = load_aggregate("geo_hub_orders").set_index("hub_id")["orders"]
+
 # Add hubs as markers
 for _, hub in hubs.iterrows():
     if pd.notna(hub["hub_latitude"]) and pd.notna(hub["hub_longitude"]):
-        # Count orders per hub
-        hub_orders = df[df["hub_id"] == hub["hub_id"]].shape[0]
+        hub_orders = int(orders_by_hub.get(hub["hub_id"], 0))
 
         folium.CircleMarker(
             location=[hub["hub_latitude"], hub["hub_longitude"]],
@@ -53,13 +56,7 @@ st_folium(m, width=None, height=500)
 # ============================================
 st.markdown("### Performance by State")
 
-state_metrics = df.groupby("hub_state").agg(
-    total_orders=("order_id", "count"),
-    avg_cycle_time=("order_metric_cycle_time", "mean"),
-    avg_amount=("order_amount", "mean"),
-    total_stores=("store_id", "nunique"),
-    total_hubs=("hub_id", "nunique")
-).reset_index().sort_values("total_orders", ascending=False)
+state_metrics = load_aggregate("geo_state_metrics")
 
 fig = px.treemap(
     state_metrics,
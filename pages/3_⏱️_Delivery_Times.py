@@ -1,46 +1,81 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import sys, os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_loader import load_full_dataset
+from utils.aggregations import AGGREGATES
+from utils.data_loader import latest_artefact_version, load_aggregate, load_full_dataset
+from utils.datasets import dataset_selector
+from utils.scheduler import get_scheduler, render_as_completed
 
 st.set_page_config(page_title="Delivery Times", page_icon="⏱️", layout="wide")
+dataset = dataset_selector()
 st.title("⏱️ Delivery Time Analysis")
 
-df = load_full_dataset()
+# Filter options and available breakdowns come from a small aggregate, so
+# the snapshot itself is only needed (in the pool) once a filter is set
+dimensions = load_aggregate("times_dimensions")
+values = dimensions.groupby("column")["value"].apply(list).to_dict()
+has_vehicle = "driver_modal" in values
 
 # ============================================
-# DELIVERY CYCLE BREAKDOWN
+# SIDEBAR FILTERS
 # ============================================
-st.markdown("### Cycle Time Breakdown")
-st.markdown("""
-The delivery cycle is made up of multiple stages.
-Finding **where the most time is lost** is key to improving operations.
-""")
+with st.sidebar:
+    st.header("Filters")
 
-# Compute averages for each time metric
-time_metrics = {
-    "Production Time": df["order_metric_production_time"].mean(),
-    "Collected Time": df["order_metric_collected_time"].mean(),
-    "Walking Time": df["order_metric_walking_time"].mean(),
-    "Expedition Speed": df["order_metric_expediton_speed_time"].mean(),
-    "Transit Time": df["order_metric_transit_time"].mean(),
-}
+    cities = ["All"] + values.get("hub_city", [])
+    city_sel = st.selectbox("City", cities)
 
-time_df = (
-    pd.DataFrame(list(time_metrics.items()), columns=["Stage", "Avg time (min)"])
-    .sort_values("Avg time (min)", ascending=True)
+    channels = ["All"] + values.get("channel_name", [])
+    channel_sel = st.selectbox("Channel", channels)
+
+    segments = ["All"] + values.get("store_segment", [])
+    segment_sel = st.selectbox("Segment", segments)
+
+filters = tuple(
+    (col, sel) for col, sel in (
+        ("hub_city", city_sel), ("channel_name", channel_sel), ("store_segment", segment_sel)
+    ) if sel != "All"
 )
 
-# Remove NaNs and non-positive values
-time_df = time_df[time_df["Avg time (min)"] > 0]
+# ============================================
+# SECTION SCHEDULING
+# ============================================
+# Every section runs in the background pool: unfiltered ones load the
+# shared aggregate (already cached by the loader), filtered ones load and
+# slice the snapshot there and are cached per filter state. Each section is
+# drawn as soon as its result is ready. Pool threads have no session, so
+# the dataset is always passed explicitly.
+scheduler = get_scheduler()
+version = latest_artefact_version()
+
+def filtered_section(dataset, filters, name):
+    df = load_full_dataset(dataset)
+    for col, sel in filters:
+        df = df[df[col] == sel]
+    return AGGREGATES[name](df)
+
+def section(name):
+    key = ("delivery_times", version, filters, name)
+    if not filters:
+        return scheduler.submit(dataset, key, load_aggregate, name, dataset, memoise=False)
+    return scheduler.submit(dataset, key, filtered_section, dataset, filters, name)
+
+# Submitted in display order so the visible sections finish first
+SECTIONS = [
+    "times_stage_means", "times_by_vehicle", "times_by_segment",
+    "times_by_channel", "times_by_city", "times_distribution",
+]
+if not has_vehicle:
+    SECTIONS.remove("times_by_vehicle")
+futures = {name: section(name) for name in SECTIONS}
 
-col1, col2 = st.columns([2, 1])
+# ============================================
+# SECTION RENDERERS
+# ============================================
 
-with col1:
+def render_stages(time_df):
     fig = px.bar(
         time_df,
         x="Avg time (min)",
@@ -57,6 +92,94 @@ with col1:
     )
     st.plotly_chart(fig, use_container_width=True)
 
+def render_vehicle(vehicle_time):
+    fig = px.bar(
+        vehicle_time.sort_values("Mean"),
+        x="Vehicle",
+        y=["Mean", "Median"],
+        barmode="group",
+        title="Average cycle time by vehicle type"
+    )
+    fig.update_layout(height=400, yaxis_title="Minutes")
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_mean_bars(label):
+    def render(table):
+        fig = px.bar(
+            table.sort_values("Mean"),
+            x=label,
+            y="Mean",
+            color="Mean",
+            color_continuous_scale="RdYlGn_r"
+        )
+        fig.update_layout(height=400, yaxis_title="Minutes", coloraxis_showscale=False)
+        st.plotly_chart(fig, use_container_width=True)
+    return render
+
+def render_city(city_time):
+    fig = px.scatter(
+        city_time,
+        x="Orders",
+        y="Mean",
+        size="Orders",
+        hover_name="City",
+        title="Cities: volume vs cycle time"
+    )
+    fig.update_layout(
+        height=450,
+        xaxis_title="Order volume",
+        yaxis_title="Cycle Time (min)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_distribution(distribution):
+    cycle_data = distribution["cycle_time"]
+
+    fig = px.histogram(
+        cycle_data,
+        nbins=50,
+        title="Cycle Time distribution (extreme outliers removed)",
+        labels={"value": "Cycle Time (min)", "count": "Frequency"}
+    )
+
+    fig.add_vline(
+        x=cycle_data.mean(),
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Mean: {cycle_data.mean():.0f} min",
+        annotation_position="top",
+        annotation_xshift=20,
+        annotation_yshift=10
+    )
+
+    fig.add_vline(
+        x=cycle_data.median(),
+        line_dash="dash",
+        line_color="green",
+        annotation_text=f"Median: {cycle_data.median():.0f} min",
+        annotation_position="top",
+        annotation_xshift=-20,
+        annotation_yshift=30
+    )
+
+    fig.update_layout(height=400, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+# ============================================
+# DELIVERY CYCLE BREAKDOWN
+# ============================================
+st.markdown("### Cycle Time Breakdown")
+st.markdown("""
+The delivery cycle is made up of multiple stages.
+Finding **where the most time is lost** is key to improving operations.
+""")
+
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    # Average of each stage (NaNs and non-positive values removed)
+    stages_slot = st.empty()
+
 with col2:
     st.markdown("#### What does each stage mean?")
     st.markdown("""
@@ -79,82 +202,28 @@ tab1, tab2, tab3, tab4 = st.tabs([
 ])
 
 with tab1:
-    if "driver_modal" in df.columns:
-        vehicle_time = df.groupby("driver_modal")["order_metric_cycle_time"].agg(
-            ["mean", "median", "count"]
-        ).reset_index()
-        vehicle_time.columns = ["Vehicle", "Mean", "Median", "Orders"]
-        vehicle_time = vehicle_time[vehicle_time["Orders"] > 100]  # Reduce noise
-
-        fig = px.bar(
-            vehicle_time.sort_values("Mean"),
-            x="Vehicle",
-            y=["Mean", "Median"],
-            barmode="group",
-            title="Average cycle time by vehicle type"
-        )
-        fig.update_layout(height=400, yaxis_title="Minutes")
-        st.plotly_chart(fig, use_container_width=True)
+    if has_vehicle:
+        vehicle_slot = st.empty()  # Vehicles with 100+ orders
 
         st.info("""
         💡 **Insight**: Compare mean vs median.
         If the mean is much higher than the median, outliers
         (very long deliveries) are pulling the average up.
         """)
+        st.page_link(
+            "pages/5_🚴_Drivers.py",
+            label="Speed, deliveries per hour and utilisation by vehicle and driver",
+            icon="🚴"
+        )
 
 with tab2:
-    segment_time = df.groupby("store_segment")["order_metric_cycle_time"].agg(
-        ["mean", "median", "count"]
-    ).reset_index()
-    segment_time.columns = ["Segment", "Mean", "Median", "Orders"]
-
-    fig = px.bar(
-        segment_time.sort_values("Mean"),
-        x="Segment",
-        y="Mean",
-        color="Mean",
-        color_continuous_scale="RdYlGn_r"
-    )
-    fig.update_layout(height=400, yaxis_title="Minutes", coloraxis_showscale=False)
-    st.plotly_chart(fig, use_container_width=True)
+    segment_slot = st.empty()
 
 with tab3:
-    channel_time = df.groupby("channel_name")["order_metric_cycle_time"].agg(
-        ["mean", "median", "count"]
-    ).reset_index()
-    channel_time.columns = ["Channel", "Mean", "Median", "Orders"]
-
-    fig = px.bar(
-        channel_time.sort_values("Mean"),
-        x="Channel",
-        y="Mean",
-        color="Mean",
-        color_continuous_scale="RdYlGn_r"
-    )
-    fig.update_layout(height=400, yaxis_title="Minutes", coloraxis_showscale=False)
-    st.plotly_chart(fig, use_container_width=True)
+    channel_slot = st.empty()
 
 with tab4:
-    city_time = df.groupby("hub_city")["order_metric_cycle_time"].agg(
-        ["mean", "median", "count"]
-    ).reset_index()
-    city_time.columns = ["City", "Mean", "Median", "Orders"]
-    city_time = city_time[city_time["Orders"] > 500]  # Keep relevant cities
-
-    fig = px.scatter(
-        city_time,
-        x="Orders",
-        y="Mean",
-        size="Orders",
-        hover_name="City",
-        title="Cities: volume vs cycle time"
-    )
-    fig.update_layout(
-        height=450,
-        xaxis_title="Order volume",
-        yaxis_title="Cycle Time (min)"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    city_slot = st.empty()  # Cities with 500+ orders
 
 st.divider()
 
@@ -163,37 +232,20 @@ st.divider()
 # ============================================
 st.markdown("### Cycle Time Distribution")
 
-cycle_data = df["order_metric_cycle_time"].dropna()
-
-# Remove extreme outliers for visualization
-cycle_data = cycle_data[(cycle_data > 0) & (cycle_data < cycle_data.quantile(0.99))]
-
-fig = px.histogram(
-    cycle_data,
-    nbins=50,
-    title="Cycle Time distribution (extreme outliers removed)",
-    labels={"value": "Cycle Time (min)", "count": "Frequency"}
-)
-
-fig.add_vline(
-    x=cycle_data.mean(),
-    line_dash="dash",
-    line_color="red",
-    annotation_text=f"Mean: {cycle_data.mean():.0f} min",
-    annotation_position="top",
-    annotation_xshift=20,
-    annotation_yshift=10
-)
+# Extreme outliers (top 1%) removed for visualization
+distribution_slot = st.empty()
 
-fig.add_vline(
-    x=cycle_data.median(),
-    line_dash="dash",
-    line_color="green",
-    annotation_text=f"Median: {cycle_data.median():.0f} min",
-    annotation_position="top",
-    annotation_xshift=-20,
-    annotation_yshift=30
-)
+# ============================================
+# PROGRESSIVE RENDERING
+# ============================================
+sections = {
+    "times_stage_means": (futures["times_stage_means"], stages_slot, render_stages),
+    "times_by_segment": (futures["times_by_segment"], segment_slot, render_mean_bars("Segment")),
+    "times_by_channel": (futures["times_by_channel"], channel_slot, render_mean_bars("Channel")),
+    "times_by_city": (futures["times_by_city"], city_slot, render_city),
+    "times_distribution": (futures["times_distribution"], distribution_slot, render_distribution),
+}
+if has_vehicle:
+    sections["times_by_vehicle"] = (futures["times_by_vehicle"], vehicle_slot, render_vehicle)
 
-fig.update_layout(height=400, showlegend=False)
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+render_as_completed(sections)
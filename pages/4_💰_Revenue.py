@@ -1,15 +1,16 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import sys, os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_loader import load_full_dataset
+from utils.data_loader import load_aggregate
+from utils.datasets import dataset_selector
 
 st.set_page_config(page_title="Revenue", page_icon="💰", layout="wide")
+dataset_selector()
 st.title("💰 Revenue & Payment Analytics")
 
-df = load_full_dataset()
+kpis = load_aggregate("revenue_kpis").iloc[0]
 
 # ============================================
 # REVENUE KPIs
@@ -17,16 +18,13 @@ df = load_full_dataset()
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_revenue = df["order_amount"].sum()
-    st.metric("Total Revenue", f"R$ {total_revenue:,.0f}")
+    st.metric("Total Revenue", f"R$ {kpis['total_revenue']:,.0f}")
 with col2:
-    total_fees = df["payment_fee"].sum()
-    st.metric("Total Fees", f"R$ {total_fees:,.0f}")
+    st.metric("Total Fees", f"R$ {kpis['total_fees']:,.0f}")
 with col3:
-    avg_delivery_fee = df["order_delivery_fee"].mean()
-    st.metric("Avg Delivery Fee", f"R$ {avg_delivery_fee:,.2f}")
+    st.metric("Avg Delivery Fee", f"R$ {kpis['avg_delivery_fee']:,.2f}")
 with col4:
-    avg_delivery_cost = df["order_delivery_cost"].mean()
+    avg_delivery_cost = kpis["avg_delivery_cost"]
     st.metric("Avg Delivery Cost", f"R$ {avg_delivery_cost:,.2f}")
 
 st.divider()
@@ -38,11 +36,7 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("#### Revenue by store segment")
-    segment_rev = df.groupby("store_segment").agg(
-        revenue=("order_amount", "sum"),
-        orders=("order_id", "count"),
-        avg_ticket=("order_amount", "mean")
-    ).reset_index().sort_values("revenue", ascending=False)
+    segment_rev = load_aggregate("revenue_by_segment")
 
     fig = px.bar(
         segment_rev,
@@ -58,8 +52,7 @@ with col1:
 with col2:
     st.markdown("#### Payment methods")
 
-    payment_dist = df["payment_method"].value_counts().nlargest(5).reset_index()
-    payment_dist.columns = ["method", "count"]
+    payment_dist = load_aggregate("revenue_payment_methods")
 
     fig = px.pie(
         payment_dist,
@@ -80,14 +73,11 @@ st.markdown("""
 If the fee charged to the customer is higher than the delivery cost, the margin is positive.
 """)
 
-# Compute per-order margin
-df["delivery_margin"] = df["order_delivery_fee"] - df["order_delivery_cost"]
-
 col1, col2 = st.columns(2)
 
 with col1:
-    margin_positive = (df["delivery_margin"] > 0).sum()
-    margin_negative = (df["delivery_margin"] <= 0).sum()
+    margin_positive = kpis["margin_positive"]
+    margin_negative = kpis["margin_negative"]
     total = margin_positive + margin_negative
 
     st.metric(
@@ -96,7 +86,7 @@ with col1:
     )
 
 with col2:
-    avg_margin = df["delivery_margin"].mean()
+    avg_margin = kpis["avg_margin"]
     st.metric(
         "Avg margin per delivery",
         f"R$ {avg_margin:,.2f}",
@@ -104,11 +94,7 @@ with col2:
     )
 
 # Margin by city
-city_margin = df.groupby("hub_city").agg(
-    avg_margin=("delivery_margin", "mean"),
-    total_orders=("order_id", "count")
-).reset_index()
-city_margin = city_margin[city_margin["total_orders"] > 500]
+city_margin = load_aggregate("revenue_city_margin")
 
 fig = px.scatter(
     city_margin,
@@ -0,0 +1,131 @@
+import streamlit as st
+import plotly.express as px
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_loader import load_driver_aggregate
+from utils.datasets import dataset_selector
+from utils.drivers import METRICS, top_n
+
+st.set_page_config(page_title="Drivers", page_icon="🚴", layout="wide")
+dataset_selector()
+st.title("🚴 Driver & Vehicle Efficiency")
+
+st.markdown("""
+Distance-normalised metrics per driver and vehicle type.
+**Speed** is distance over transit time, **deliveries per hour** counts only the hours
+a driver was active, and **utilisation** is the share of those hours spent in transit.
+""")
+
+drivers = load_driver_aggregate("drivers_by_driver")
+modal = load_driver_aggregate("drivers_by_modal")
+
+# ============================================
+# SIDEBAR FILTERS
+# ============================================
+with st.sidebar:
+    st.header("Filters")
+
+    metric = st.selectbox("Rank drivers by", list(METRICS), format_func=METRICS.get)
+    n = st.slider("Top N", 5, 100, 20, step=5)
+    order = st.radio("Order", ["Highest", "Lowest"], horizontal=True)
+    min_deliveries = st.slider("Min deliveries per driver", 1, 200, 20)
+
+    modals = ["All"] + sorted(drivers["driver_modal"].unique().tolist())
+    modal_sel = st.selectbox("Vehicle", modals)
+
+    window = st.radio("Time window", ["Daily", "Weekly"], horizontal=True)
+
+# ============================================
+# VEHICLE SUMMARY
+# ============================================
+st.markdown("### By vehicle")
+
+col1, col2, col3 = st.columns(3)
+
+for col, m in zip((col1, col2, col3), ("speed_kmh", "deliveries_per_hour", "utilisation")):
+    with col:
+        st.markdown(f"#### {METRICS[m]}")
+        fig = px.bar(
+            modal.sort_values(m),
+            x="driver_modal",
+            y=m,
+            color="driver_modal",
+            color_discrete_sequence=px.colors.qualitative.Pastel
+        )
+        fig.update_layout(height=320, margin=dict(t=10), xaxis_title="", yaxis_title="", showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
+st.divider()
+
+# ============================================
+# DRIVER RANKING
+# ============================================
+st.markdown(f"### {order} {n} drivers by {METRICS[metric].lower()}")
+
+pool = drivers if modal_sel == "All" else drivers[drivers["driver_modal"] == modal_sel]
+ranking = top_n(pool, metric, n=n, largest=order == "Highest", min_deliveries=min_deliveries)
+
+st.caption(f"{len(pool):,} drivers considered · minimum {min_deliveries} deliveries")
+st.dataframe(
+    ranking[["driver_id", "driver_modal", "deliveries", "distance_km",
+             "active_hours", "speed_kmh", "deliveries_per_hour", "utilisation"]]
+    .style.format({
+        "deliveries": "{:,.0f}",
+        "distance_km": "{:,.1f}",
+        "active_hours": "{:,.0f}",
+        "speed_kmh": "{:.1f}",
+        "deliveries_per_hour": "{:.2f}",
+        "utilisation": "{:.0%}"
+    }),
+    use_container_width=True,
+    hide_index=True
+)
+
+st.divider()
+
+# ============================================
+# EFFICIENCY OVER TIME
+# ============================================
+st.markdown("### Efficiency over time")
+
+over_time = load_driver_aggregate(
+    "drivers_by_modal_daily" if window == "Daily" else "drivers_by_modal_weekly"
+)
+trend_metric = st.selectbox(
+    "Metric",
+    ["utilisation", "speed_kmh", "deliveries_per_hour"],
+    format_func=METRICS.get,
+    key="trend_metric"
+)
+
+fig = px.line(
+    over_time.sort_values("window"),
+    x="window",
+    y=trend_metric,
+    color="driver_modal",
+    markers=window == "Weekly"
+)
+fig.update_layout(height=400, margin=dict(t=10), xaxis_title="", yaxis_title=METRICS[trend_metric])
+st.plotly_chart(fig, use_container_width=True)
+
+# Weekly trend of the ranked drivers
+st.markdown("#### Ranked drivers, week by week")
+
+if ranking.empty:
+    st.info("No drivers match the current filters.")
+else:
+    by_driver = load_driver_aggregate("drivers_by_driver_weekly")
+    driver_trend = by_driver[by_driver["driver_id"].isin(ranking["driver_id"].head(10))]
+    driver_trend = driver_trend.assign(Driver=driver_trend["driver_id"].astype(str))
+
+    fig = px.line(
+        driver_trend.sort_values("window"),
+        x="window",
+        y=trend_metric,
+        color="Driver",
+        markers=True
+    )
+    fig.update_layout(height=400, margin=dict(t=10), xaxis_title="", yaxis_title=METRICS[trend_metric])
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption("Top 10 drivers of the ranking above.")
@@ -0,0 +1,136 @@
+import streamlit as st
+import numpy as np
+import plotly.express as px
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_loader import load_anomalies, load_full_dataset, load_hubs
+from utils.datasets import dataset_selector
+from utils.anomalies import BASELINE_DAYS, HUB_HOUR_Z, ORDER_Z, STAGES, stage_breaches
+
+st.set_page_config(page_title="Alerts", page_icon="🚨", layout="wide")
+dataset_selector()
+st.title("🚨 Cycle-Time Alerts")
+
+st.markdown(f"""
+Each day, every stage is compared with a robust baseline (median and MAD) for the same **hub and
+hour of day** over the previous **{BASELINE_DAYS} days**. Orders with a modified z-score
+(0.6745 × deviation / MAD) above **{ORDER_Z}** are flagged, and a hub-hour is flagged when the
+modified z-score of its median cycle time exceeds **{HUB_HOUR_Z}**, about
+**{HUB_HOUR_Z / 0.6745:.1f}** MADs above its usual level.
+""")
+
+STAGE_LABELS = {
+    "order_metric_production_time": "Production",
+    "order_metric_collected_time": "Collected",
+    "order_metric_walking_time": "Walking",
+    "order_metric_expediton_speed_time": "Expedition",
+    "order_metric_transit_time": "Transit",
+    "order_metric_cycle_time": "Cycle",
+    "order_metric_paused_time": "Paused",
+}
+
+state = load_anomalies()
+flagged = state["orders"]
+hub_hours = state["hub_hours"]
+hubs = load_hubs()[["hub_id", "hub_name", "hub_city"]]
+
+# ============================================
+# SUMMARY
+# ============================================
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("Flagged orders", f"{len(flagged):,}")
+with col2:
+    scored = len(state["scored_ids"])
+    st.metric("Share of orders", f"{len(flagged) / scored * 100:.2f}%" if scored else "—")
+with col3:
+    st.metric("Flagged hub-hours", f"{len(hub_hours):,}")
+with col4:
+    st.metric("Hubs affected", f"{hub_hours['hub_id'].nunique():,}")
+
+st.divider()
+
+# ============================================
+# BREACHES BY STAGE
+# ============================================
+col1, col2 = st.columns([1, 2])
+
+with col1:
+    st.markdown("#### Breaches by stage")
+    breaches = stage_breaches(flagged["flags"])
+    breaches["stage"] = breaches["stage"].map(STAGE_LABELS)
+
+    fig = px.bar(
+        breaches.sort_values("orders"),
+        x="orders",
+        y="stage",
+        orientation="h",
+        color="orders",
+        color_continuous_scale="Reds"
+    )
+    fig.update_layout(
+        height=350,
+        margin=dict(t=10),
+        xaxis_title="Flagged orders",
+        yaxis_title="",
+        coloraxis_showscale=False
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+with col2:
+    st.markdown("#### Flagged hub-hours over time")
+    daily = (
+        hub_hours.assign(day=hub_hours["window"].dt.floor("D"))
+        .groupby("day")
+        .size()
+        .reset_index(name="hub_hours")
+    )
+
+    fig = px.bar(daily, x="day", y="hub_hours")
+    fig.update_layout(height=350, margin=dict(t=10), xaxis_title="", yaxis_title="Hub-hours")
+    st.plotly_chart(fig, use_container_width=True)
+
+st.divider()
+
+# ============================================
+# HUB-HOUR ALERTS
+# ============================================
+st.markdown("### Most severe hub-hours")
+
+top_hub_hours = (
+    hub_hours.nlargest(50, "z")
+    .merge(hubs, on="hub_id", how="left")
+    [["window", "hub_name", "hub_city", "orders", "median_cycle_time", "baseline_median", "z"]]
+)
+st.dataframe(
+    top_hub_hours.style.format({
+        "window": "{:%Y-%m-%d %H:00}",
+        "orders": "{:,.0f}",
+        "median_cycle_time": "{:.1f} min",
+        "baseline_median": "{:.1f} min",
+        "z": "{:.1f}"
+    }),
+    use_container_width=True,
+    hide_index=True
+)
+
+# ============================================
+# ORDER ALERTS
+# ============================================
+st.markdown("### Flagged orders by stage")
+
+stage_sel = st.selectbox("Stage", STAGES, format_func=STAGE_LABELS.get, index=STAGES.index("order_metric_cycle_time"))
+bit = np.uint8(1 << STAGES.index(stage_sel))
+stage_ids = flagged.loc[(flagged["flags"].to_numpy() & bit) > 0, "order_id"]
+
+df = load_full_dataset()
+orders = df[df["order_id"].isin(stage_ids)].nlargest(200, stage_sel)
+
+st.caption(f"{len(stage_ids):,} orders flagged on {STAGE_LABELS[stage_sel].lower()} · showing the 200 slowest")
+st.dataframe(
+    orders[["order_id", "order_moment_created", "hub_name", "hub_city", "store_segment", stage_sel]],
+    use_container_width=True,
+    hide_index=True
+)
@@ -0,0 +1,116 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import anomalies
+from utils.anomalies import STAGES, detect, update
+
+START = pd.Timestamp("2021-01-01")
+
+
+def orders(n: int = 12_000, days: int = 45, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    created = START + pd.to_timedelta(rng.integers(0, days * 24 * 60, n), unit="min")
+    df = pd.DataFrame({
+        "order_id": np.arange(n) + 1000,
+        "hub_id": rng.integers(0, 2, n),
+        "order_moment_created": created,
+        "order_created_hour": created.hour,
+    })
+    for stage in STAGES:
+        df[stage] = rng.gamma(2, 10, n)
+    # A few slow afternoons at hub 0, late enough to have a baseline
+    slow = (df["hub_id"] == 0) & df["order_created_hour"].between(12, 14) & (created.day % 7 == 3)
+    df.loc[slow & (created >= START + pd.Timedelta(days=10)), "order_metric_cycle_time"] *= 3
+    return df
+
+
+def before(df: pd.DataFrame, moment: str) -> pd.DataFrame:
+    return df[df["order_moment_created"] < pd.Timestamp(moment)]
+
+
+def assert_same_flags(a: dict, b: dict):
+    pd.testing.assert_frame_equal(
+        a["orders"].sort_values("order_id").reset_index(drop=True),
+        b["orders"].sort_values("order_id").reset_index(drop=True),
+    )
+    pd.testing.assert_frame_equal(
+        a["hub_hours"].sort_values(["hub_id", "window"]).reset_index(drop=True),
+        b["hub_hours"].sort_values(["hub_id", "window"]).reset_index(drop=True),
+    )
+    np.testing.assert_array_equal(a["scored_ids"], b["scored_ids"])
+
+
+@pytest.mark.parametrize("cuts", [
+    ["2021-02-01"],                                     # day boundary
+    ["2021-02-01 13:30"],                               # mid-day
+    ["2021-01-10", "2021-01-10 18:00", "2021-02-05"],   # several runs
+])
+def test_update_matches_full_detection(cuts):
+    df = orders()
+    state = None
+    for cut in cuts:
+        state = update(before(df, cut), state)
+
+    full = detect(df)
+    assert len(full["orders"]) and len(full["hub_hours"])
+    assert_same_flags(update(df, state), full)
+
+
+def test_update_without_new_orders_returns_state():
+    df = orders(5_000)
+    state = detect(df)
+    assert update(df, state) is state
+
+
+def test_state_from_other_window_is_rebuilt(monkeypatch):
+    df = orders(5_000)
+    state = detect(df)
+    monkeypatch.setattr(anomalies, "BASELINE_DAYS", 7)
+
+    rebuilt = update(df, state)
+    assert rebuilt["baseline_days"] == 7
+    assert_same_flags(rebuilt, detect(df))
+
+
+def test_first_day_has_no_baseline():
+    df = orders()
+    state = detect(df)
+
+    first_day = df.loc[df["order_moment_created"] < START + pd.Timedelta(days=1), "order_id"]
+    assert not state["orders"]["order_id"].isin(first_day).any()
+    assert (state["hub_hours"]["window"] >= START + pd.Timedelta(days=1)).all()
+
+
+def test_slow_order_is_flagged_on_its_stage():
+    df = orders()
+    slow = df.index[df["order_moment_created"] > START + pd.Timedelta(days=40)][0]
+    df.loc[slow, "order_metric_transit_time"] = 10_000.0
+
+    flagged = detect(df)["orders"].set_index("order_id")["flags"]
+    bit = 1 << STAGES.index("order_metric_transit_time")
+    assert flagged[df.loc[slow, "order_id"]] & bit
+
+
+@pytest.mark.parametrize("df", [
+    orders().iloc[:0],
+    orders(100).assign(order_moment_created=pd.NaT),
+], ids=["empty", "all-nat"])
+def test_no_scored_day_gives_empty_state(df):
+    state = detect(df)
+
+    assert state["orders"].empty
+    assert list(state["orders"].columns) == ["order_id", "flags"]
+    assert list(state["hub_hours"].columns) == [
+        "hub_id", "window", "orders", "median_cycle_time", "baseline_median", "z"
+    ]
+    assert len(state["scored_ids"]) == len(df)
+
+
+def test_update_from_empty_state():
+    df = orders()
+    assert_same_flags(update(df, detect(df.iloc[:0])), detect(df))
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import cache as cache_module
+from utils.cache import BudgetedCache
+
+
+def blob(nbytes: int) -> np.ndarray:
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+@pytest.fixture
+def cache():
+    return BudgetedCache(1000, max_entry_fraction=0.5)
+
+
+def store(cache, name, nbytes, fn="load", **kwargs):
+    return cache.get_or_compute(("ds", fn, (name,)), lambda: blob(nbytes), **kwargs)
+
+
+def keys(cache):
+    return [key[2][0] for key in cache._entries]
+
+
+def test_budget_evicts_least_recently_used_first(cache):
+    store(cache, "a", 400)
+    store(cache, "b", 400)
+    store(cache, "a", 400)              # hit: a becomes most recent
+    store(cache, "c", 400)              # over budget: b goes, not a
+
+    assert keys(cache) == ["a", "c"]
+    assert cache.nbytes == 800
+    assert cache.stats["ds"]["evicted_budget"] == 1
+    assert cache.stats["ds"]["hits"] == 1
+    assert cache.stats["ds"]["misses"] == 3
+
+
+def test_budget_evicts_until_new_entry_fits(cache):
+    for name in "abcd":
+        store(cache, name, 200)
+    store(cache, "e", 500)
+
+    assert keys(cache) == ["c", "d", "e"]
+    assert cache.nbytes == 900
+
+
+def test_oversize_value_is_returned_but_not_cached(cache):
+    store(cache, "a", 300)
+    value = store(cache, "big", 600)
+    store(cache, "big", 600)
+
+    assert value.nbytes == 600
+    assert keys(cache) == ["a"]
+    assert cache.nbytes == 300
+    assert cache.stats["ds"]["rejected_oversize"] == 2
+    assert cache.stats["ds"]["misses"] == 3
+    assert "evicted_budget" not in cache.stats["ds"]
+
+
+def test_max_entries_is_per_dataset_and_function(cache):
+    for name in "abc":
+        store(cache, name, 10, max_entries=2)
+    store(cache, "x", 10, fn="other", max_entries=2)
+    cache.get_or_compute(("other_ds", "load", ("y",)), lambda: blob(10), max_entries=2)
+
+    assert keys(cache) == ["b", "c", "x", "y"]
+    assert cache.stats["ds"]["evicted_max_entries"] == 1
+    assert "evicted_max_entries" not in cache.stats["other_ds"]
+
+
+def test_key_locks_are_released_after_compute(cache):
+    store(cache, "a", 10)
+    store(cache, "big", 600)
+    with pytest.raises(ValueError):
+        cache.get_or_compute(("ds", "load", ("bad",)), lambda: int("x"))
+
+    assert cache._key_locks == {}
+
+
+def test_expired_entries_are_evicted_before_lru(cache, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+
+    store(cache, "old", 400)
+    store(cache, "short", 100, ttl=5)
+    now[0] = 10.0
+    store(cache, "new", 400)
+
+    assert keys(cache) == ["old", "new"]
+    assert cache.stats["ds"]["evicted_ttl"] == 1
+    assert "evicted_budget" not in cache.stats["ds"]
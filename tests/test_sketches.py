@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.sketches import M, P, _registers, build_cube, count_distinct, count_distinct_by
+
+# ~3 standard errors at P = 14
+TOLERANCE = 3 * 1.04 / np.sqrt(M)
+
+
+def orders(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_id": np.arange(n) * 7 + 3,
+        "store_id": rng.integers(0, max(1, n // 10), n),
+        "hub_id": rng.integers(0, 30, n).astype(float),
+        "hub_city": rng.choice(["A", "B", "C"], n),
+        "channel_name": rng.choice(["x", "y"], n),
+        "store_segment": rng.choice(["FOOD", "GOOD"], n),
+        "order_created_year": 2021,
+        "order_created_month": rng.integers(1, 5, n),
+    })
+
+
+def relative_error(estimate, exact):
+    return abs(estimate - exact) / exact
+
+
+def test_registers_are_in_range():
+    idx, rank = _registers(np.arange(100_000))
+
+    assert idx.max() < M
+    assert rank.min() >= 1
+    assert rank.max() <= 64 - P + 1
+    # Ranks are geometric: about half the values have rank 1
+    assert 0.45 < (rank == 1).mean() < 0.55
+
+
+@pytest.mark.parametrize("n", [100, 5_000, 50_000, 300_000])
+def test_estimate_within_error_bound(n):
+    df = orders(n)
+    cube = build_cube(df)
+
+    for col in ("order_id", "store_id", "hub_id"):
+        assert relative_error(count_distinct(cube, col), df[col].nunique()) <= TOLERANCE
+
+
+def test_filtered_merge_matches_nunique():
+    df = orders(100_000)
+    cube = build_cube(df)
+    filters = {"hub_city": "A", "channel_name": "x"}
+
+    exact = df[(df["hub_city"] == "A") & (df["channel_name"] == "x")]
+    for col in ("order_id", "store_id"):
+        assert relative_error(count_distinct(cube, col, **filters), exact[col].nunique()) <= TOLERANCE
+
+
+def test_empty_selection():
+    cube = build_cube(orders(1_000))
+
+    assert count_distinct(cube, "order_id", hub_city="nowhere") == 0
+    assert count_distinct_by(cube, "order_id", by=["order_created_month"], hub_city="nowhere").empty
+
+
+def test_empty_frame():
+    cube = build_cube(orders(0))
+    assert count_distinct(cube, "order_id") == 0
+
+
+def test_grouping_by_dimensions():
+    df = orders(100_000)
+    cube = build_cube(df)
+    by = ["order_created_year", "order_created_month"]
+
+    estimate = count_distinct_by(cube, "order_id", by=by, store_segment="FOOD")
+    exact = df[df["store_segment"] == "FOOD"].groupby(by)["order_id"].nunique()
+
+    assert list(estimate.index) == list(exact.index)
+    assert (relative_error(estimate, exact) <= TOLERANCE).all()
+
+
+def test_grouping_by_single_dimension():
+    df = orders(50_000)
+    cube = build_cube(df)
+
+    estimate = count_distinct_by(cube, "order_id", by=["hub_city"])
+    exact = df.groupby("hub_city")["order_id"].nunique()
+
+    assert estimate.index.tolist() == ["A", "B", "C"]
+    assert (relative_error(estimate, exact) <= TOLERANCE).all()
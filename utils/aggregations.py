@@ -0,0 +1,228 @@
+"""
+Aggregate tables behind the dashboard charts.
+
+Every function takes the master dataframe returned by load_full_dataset()
+and returns a small dataframe that a page can plot directly. The same
+functions are used by the pages at request time and by the offline
+precompute pipeline (utils/precompute.py), so both paths always agree.
+"""
+from functools import partial
+
+import pandas as pd
+
+# Cycle-time stages shown on the Delivery Times page, in display order
+STAGE_COLUMNS = {
+    "Production Time": "order_metric_production_time",
+    "Collected Time": "order_metric_collected_time",
+    "Walking Time": "order_metric_walking_time",
+    "Expedition Speed": "order_metric_expediton_speed_time",
+    "Transit Time": "order_metric_transit_time",
+}
+
+# ============================================
+# KPIs
+# ============================================
+
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def kpi_overview(df: pd.DataFrame) -> pd.DataFrame:
+    """Single-row table with the average ticket and cycle time."""
+    return pd.DataFrame([{
+        "avg_amount": df["order_amount"].mean(),
+        "avg_cycle_time": df["order_metric_cycle_time"].mean(),
+    }])
+
+
+def distinct_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Single-row table with the exact number of distinct orders, stores and hubs."""
+    return pd.DataFrame([{
+        "order_id": df["order_id"].nunique(),
+        "store_id": df["store_id"].nunique(),
+        "hub_id": df["hub_id"].nunique(),
+    }])
+
+
+def orders_by_month(df: pd.DataFrame) -> pd.DataFrame:
+    """Distinct orders per year-month (exact), with a date column for plotting."""
+    orders_time = (
+        df.groupby(["order_created_year", "order_created_month"])["order_id"]
+        .nunique()
+        .reset_index(name="total_orders")
+    )
+    return with_month_date(orders_time)
+
+
+def with_month_date(orders_time: pd.DataFrame) -> pd.DataFrame:
+    """Adds the first-of-month date built from the year/month columns."""
+    orders_time["date"] = pd.to_datetime(
+        orders_time["order_created_year"].astype(str)
+        + "-"
+        + orders_time["order_created_month"].astype(str).str.zfill(2)
+        + "-01"
+    )
+    return orders_time.sort_values("date")
+
+
+def order_status(df: pd.DataFrame) -> pd.DataFrame:
+    """Order count per status."""
+    status_counts = df["order_status"].value_counts().reset_index()
+    status_counts.columns = ["status", "count"]
+    return status_counts
+
+
+def top_cities(df: pd.DataFrame) -> pd.DataFrame:
+    """Top 10 cities by order volume."""
+    return df.groupby("hub_city").size().nlargest(10).reset_index(name="orders")
+
+
+def channel_volume(df: pd.DataFrame) -> pd.DataFrame:
+    """Order count per channel, largest first."""
+    return (
+        df.groupby("channel_name").size().reset_index(name="orders")
+        .sort_values("orders", ascending=False)
+    )
+
+
+def orders_heatmap(df: pd.DataFrame) -> pd.DataFrame:
+    """Weekday × hour-of-day matrix of order counts."""
+    heatmap_data = (
+        df.groupby([df["order_moment_created"].dt.day_name().rename("day_of_week"), "order_created_hour"])
+        .size()
+        .reset_index(name="orders")
+    )
+    return (
+        heatmap_data.pivot(index="day_of_week", columns="order_created_hour", values="orders")
+        .reindex(DAY_ORDER)
+        .fillna(0)
+    )
+
+# ============================================
+# GEOSPATIAL
+# ============================================
+
+def hub_orders(df: pd.DataFrame) -> pd.DataFrame:
+    """Order count per hub, used to size the map markers."""
+    return df.groupby("hub_id").size().reset_index(name="orders")
+
+
+def state_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Volume, cycle time, ticket and coverage per state."""
+    return df.groupby("hub_state").agg(
+        total_orders=("order_id", "count"),
+        avg_cycle_time=("order_metric_cycle_time", "mean"),
+        avg_amount=("order_amount", "mean"),
+        total_stores=("store_id", "nunique"),
+        total_hubs=("hub_id", "nunique")
+    ).reset_index().sort_values("total_orders", ascending=False)
+
+# ============================================
+# DELIVERY TIMES
+# ============================================
+
+def stage_means(df: pd.DataFrame) -> pd.DataFrame:
+    """Average minutes per cycle stage, NaNs and non-positive values removed."""
+    time_df = pd.DataFrame(
+        [(stage, df[col].mean()) for stage, col in STAGE_COLUMNS.items()],
+        columns=["Stage", "Avg time (min)"]
+    ).sort_values("Avg time (min)", ascending=True)
+    return time_df[time_df["Avg time (min)"] > 0]
+
+
+def cycle_time_by(df: pd.DataFrame, column: str, label: str, min_orders: int = 0) -> pd.DataFrame:
+    """Mean/median cycle time and order count per value of `column`."""
+    out = df.groupby(column)["order_metric_cycle_time"].agg(
+        ["mean", "median", "count"]
+    ).reset_index()
+    out.columns = [label, "Mean", "Median", "Orders"]
+    return out[out["Orders"] > min_orders]
+
+
+def dimension_values(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Sorted distinct non-null values of each of `columns` present in `df`, long form."""
+    return pd.concat(
+        [pd.DataFrame({"column": col, "value": sorted(df[col].dropna().unique())})
+         for col in columns if col in df.columns],
+        ignore_index=True
+    )
+
+
+def cycle_time_distribution(df: pd.DataFrame) -> pd.DataFrame:
+    """Positive cycle times below the 99th percentile (extreme outliers removed)."""
+    cycle_data = df["order_metric_cycle_time"].dropna()
+    cycle_data = cycle_data[(cycle_data > 0) & (cycle_data < cycle_data.quantile(0.99))]
+    return cycle_data.to_frame("cycle_time").reset_index(drop=True)
+
+# ============================================
+# REVENUE
+# ============================================
+
+def revenue_kpis(df: pd.DataFrame) -> pd.DataFrame:
+    """Single-row table with the headline revenue metrics."""
+    margin = df["order_delivery_fee"] - df["order_delivery_cost"]
+    return pd.DataFrame([{
+        "total_revenue": df["order_amount"].sum(),
+        "total_fees": df["payment_fee"].sum(),
+        "avg_delivery_fee": df["order_delivery_fee"].mean(),
+        "avg_delivery_cost": df["order_delivery_cost"].mean(),
+        "margin_positive": int((margin > 0).sum()),
+        "margin_negative": int((margin <= 0).sum()),
+        "avg_margin": margin.mean(),
+    }])
+
+
+def segment_revenue(df: pd.DataFrame) -> pd.DataFrame:
+    """Revenue, order count and average ticket per store segment."""
+    return df.groupby("store_segment").agg(
+        revenue=("order_amount", "sum"),
+        orders=("order_id", "count"),
+        avg_ticket=("order_amount", "mean")
+    ).reset_index().sort_values("revenue", ascending=False)
+
+
+def payment_methods(df: pd.DataFrame) -> pd.DataFrame:
+    """Top 5 payment methods by transaction count."""
+    payment_dist = df["payment_method"].value_counts().nlargest(5).reset_index()
+    payment_dist.columns = ["method", "count"]
+    return payment_dist
+
+
+def city_margin(df: pd.DataFrame) -> pd.DataFrame:
+    """Average delivery margin per city with 500+ orders."""
+    out = df.assign(
+        delivery_margin=df["order_delivery_fee"] - df["order_delivery_cost"]
+    ).groupby("hub_city").agg(
+        avg_margin=("delivery_margin", "mean"),
+        total_orders=("order_id", "count")
+    ).reset_index()
+    return out[out["total_orders"] > 500]
+
+# ============================================
+# REGISTRY
+# ============================================
+
+# Name -> builder. Names double as artefact file names, so keep them stable.
+AGGREGATES = {
+    "kpi_overview": kpi_overview,
+    "kpi_distinct_counts": distinct_counts,
+    "kpi_orders_by_month": orders_by_month,
+    "kpi_order_status": order_status,
+    "kpi_top_cities": top_cities,
+    "kpi_channel_volume": channel_volume,
+    "kpi_orders_heatmap": orders_heatmap,
+    "geo_hub_orders": hub_orders,
+    "geo_state_metrics": state_metrics,
+    "times_dimensions": partial(
+        dimension_values, columns=("hub_city", "channel_name", "store_segment", "driver_modal")
+    ),
+    "times_stage_means": stage_means,
+    "times_by_vehicle": partial(cycle_time_by, column="driver_modal", label="Vehicle", min_orders=100),
+    "times_by_segment": partial(cycle_time_by, column="store_segment", label="Segment"),
+    "times_by_channel": partial(cycle_time_by, column="channel_name", label="Channel"),
+    "times_by_city": partial(cycle_time_by, column="hub_city", label="City", min_orders=500),
+    "times_distribution": cycle_time_distribution,
+    "revenue_kpis": revenue_kpis,
+    "revenue_by_segment": segment_revenue,
+    "revenue_payment_methods": payment_methods,
+    "revenue_city_margin": city_margin,
+}
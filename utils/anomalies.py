@@ -0,0 +1,216 @@
+"""
+Anomaly and SLA-breach detection over the cycle-time stages.
+
+Baselines are robust (median / MAD) and fitted per hub and hour of day for
+every order_metric_* stage, on a rolling window: the orders of each day are
+scored against the BASELINE_DAYS days before it. An order is flagged on a
+stage when its modified z-score (0.6745 × deviation / MAD) exceeds ORDER_Z;
+flags are stored as one uint8 bitmask per order (bit i = STAGES[i]) and
+only flagged orders are kept, so the index stays small. A hub-hour (hub ×
+calendar hour) is flagged when the modified z-score of its median cycle
+time exceeds HUB_HOUR_Z, i.e. it sits about HUB_HOUR_Z / 0.6745 ≈ 3 MADs
+above the baseline for that hub and hour.
+
+Because a day's flags depend only on that day and the window before it,
+update() gives the same result as a full detect(): it re-scores only the
+days that received new orders, reading just those days plus their
+baseline windows. This assumes history before an already scored day does
+not change; rerun detect() (precompute --rescore) after backfills.
+"""
+import numpy as np
+import pandas as pd
+
+# Bit position = index in this tuple. Append only, never reorder.
+STAGES = (
+    "order_metric_production_time",
+    "order_metric_collected_time",
+    "order_metric_walking_time",
+    "order_metric_expediton_speed_time",
+    "order_metric_transit_time",
+    "order_metric_cycle_time",
+    "order_metric_paused_time",
+)
+
+CELL_KEYS = ["hub_id", "order_created_hour"]
+
+ORDER_Z = 3.5           # Iglewicz & Hoaglin cut-off for modified z-scores
+HUB_HOUR_Z = 2.0        # Modified z-score of the window median (≈ 2.97 raw MADs)
+MIN_CELL_ORDERS = 30    # Cells with fewer orders get no baseline
+MIN_WINDOW_ORDERS = 5   # Hub-hours with fewer orders are not flagged
+BASELINE_DAYS = 28      # Rolling baseline window preceding each scored day
+
+_MAD_SCALE = 0.6745
+
+
+def _stages(df: pd.DataFrame):
+    return [s for s in STAGES if s in df.columns]
+
+
+def fit_baselines(df: pd.DataFrame) -> pd.DataFrame:
+    """Median, MAD and order count per (hub, hour of day) for every stage."""
+    stages = _stages(df)
+    grouped = df.groupby(CELL_KEYS)[stages]
+    medians = grouped.median()
+    # MAD: median absolute deviation from the cell median, all stages at once
+    deviations = (df[stages] - grouped.transform("median")).abs()
+    mads = deviations.groupby([df[k] for k in CELL_KEYS]).median()
+
+    out = pd.concat(
+        [medians.add_suffix("_median"), mads.add_suffix("_mad")], axis=1
+    )
+    out["orders"] = grouped.size()
+    return out[out["orders"] >= MIN_CELL_ORDERS]
+
+
+def _robust_z(values: pd.DataFrame, baselines: pd.DataFrame, stages) -> np.ndarray:
+    """Modified z-scores of `values` rows against their cell's baseline (NaN if none)."""
+    med = baselines[[f"{s}_median" for s in stages]].to_numpy()
+    mad = baselines[[f"{s}_mad" for s in stages]].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = _MAD_SCALE * (values[stages].to_numpy(dtype="float64") - med) / mad
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+def score_orders(df: pd.DataFrame, baselines: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bitmask of breached stages for each order in `df`. Only slow-side
+    breaches count. Returns the flagged orders only: order_id, flags.
+    """
+    stages = _stages(df)
+    aligned = baselines.reindex(pd.MultiIndex.from_frame(df[CELL_KEYS]))
+    z = _robust_z(df, aligned, stages)
+
+    bits = np.zeros(len(df), dtype=np.uint8)
+    for stage, col in zip(stages, (z > ORDER_Z).T):
+        bits |= col.astype(np.uint8) << np.uint8(STAGES.index(stage))
+
+    mask = bits > 0
+    return pd.DataFrame({
+        "order_id": df["order_id"].to_numpy()[mask],
+        "flags": bits[mask],
+    })
+
+
+def _windows(df: pd.DataFrame) -> pd.Series:
+    return df["order_moment_created"].dt.floor("h").rename("window")
+
+
+def score_hub_hours(df: pd.DataFrame, baselines: pd.DataFrame) -> pd.DataFrame:
+    """Hub-hours whose median cycle time is anomalous against the baseline."""
+    stage = "order_metric_cycle_time"
+    windows = df.assign(window=_windows(df)).dropna(subset=["window", stage])
+    agg = windows.groupby(["hub_id", "window"]).agg(
+        orders=(stage, "size"),
+        median_cycle_time=(stage, "median"),
+    ).reset_index()
+    agg["order_created_hour"] = agg["window"].dt.hour
+
+    base = baselines.reindex(pd.MultiIndex.from_frame(agg[CELL_KEYS]))
+    agg["baseline_median"] = base[f"{stage}_median"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agg["z"] = _MAD_SCALE * (
+            agg["median_cycle_time"] - agg["baseline_median"]
+        ) / base[f"{stage}_mad"].to_numpy()
+    flagged = (agg["z"] > HUB_HOUR_Z) & (agg["orders"] >= MIN_WINDOW_ORDERS)
+    return agg.loc[flagged, ["hub_id", "window", "orders", "median_cycle_time", "baseline_median", "z"]] \
+        .reset_index(drop=True)
+
+
+def _score_days(df: pd.DataFrame, days, is_new: np.ndarray):
+    """
+    Scores each day in `days` against the BASELINE_DAYS before it: flags for
+    the day's new orders, and every hub-hour of the day.
+    """
+    created = df["order_moment_created"]
+    order = np.argsort(created.to_numpy(), kind="stable")
+    df, is_new = df.iloc[order], is_new[order]
+    # NaT sorts last; searchsorted only needs the dated prefix
+    day_values = created.iloc[order].dt.floor("D").to_numpy()
+    dated = int((~pd.isna(day_values)).sum())
+    day_values = day_values[:dated]
+
+    flagged, hub_hours = [], []
+    for day in sorted(days):
+        lo = np.searchsorted(day_values, np.datetime64(day - pd.Timedelta(days=BASELINE_DAYS)), "left")
+        start = np.searchsorted(day_values, np.datetime64(day), "left")
+        stop = np.searchsorted(day_values, np.datetime64(day), "right")
+        baselines = fit_baselines(df.iloc[lo:start])
+        today = df.iloc[start:stop]
+        flagged.append(score_orders(today[is_new[start:stop]], baselines))
+        hub_hours.append(score_hub_hours(today, baselines))
+    return flagged, hub_hours
+
+
+def _empty_results(df: pd.DataFrame):
+    """Typed empty flagged-order and hub-hour tables, for when no day is scored."""
+    orders = pd.DataFrame({"order_id": df["order_id"].to_numpy()[:0], "flags": np.zeros(0, dtype=np.uint8)})
+    hub_hours = pd.DataFrame({
+        "hub_id": df["hub_id"].to_numpy()[:0],
+        "window": pd.Series(dtype="datetime64[ns]"),
+        "orders": pd.Series(dtype="int64"),
+        "median_cycle_time": pd.Series(dtype="float64"),
+        "baseline_median": pd.Series(dtype="float64"),
+        "z": pd.Series(dtype="float64"),
+    })
+    return orders, hub_hours
+
+
+def detect(df: pd.DataFrame) -> dict:
+    """Full detection over `df`. Returns the state consumed by update()."""
+    return update(df, None)
+
+
+def update(df: pd.DataFrame, state) -> dict:
+    """
+    Brings `state` (from detect() or a previous update(), or None) up to
+    date with `df`. Only days containing orders that were not scored
+    before are re-evaluated. A state built with a different BASELINE_DAYS
+    (or by an older version of this module) is discarded and rebuilt.
+    """
+    if state is not None and state.get("baseline_days") != BASELINE_DAYS:
+        state = None
+
+    ids = df["order_id"].to_numpy()
+    is_new = np.ones(len(df), dtype=bool) if state is None else ~np.isin(ids, state["scored_ids"])
+    if state is not None and not is_new.any():
+        return state
+
+    days = pd.Index(df.loc[is_new, "order_moment_created"].dt.floor("D").dropna().unique())
+    flagged, hub_hours = _score_days(df, days, is_new)
+
+    if state is not None:
+        old_hub_hours = state["hub_hours"]
+        keep = ~old_hub_hours["window"].dt.floor("D").isin(days).to_numpy()
+        flagged.insert(0, state["orders"])
+        hub_hours.insert(0, old_hub_hours[keep])
+        ids = np.union1d(state["scored_ids"], ids[is_new])
+
+    empty_orders, empty_hub_hours = _empty_results(df)
+    return {
+        "orders": pd.concat(flagged, ignore_index=True) if flagged else empty_orders,
+        "hub_hours": pd.concat(hub_hours, ignore_index=True) if hub_hours else empty_hub_hours,
+        "scored_ids": np.unique(ids),
+        "baseline_days": BASELINE_DAYS,
+    }
+
+
+def stage_breaches(flags: pd.Series) -> pd.DataFrame:
+    """Number of flagged orders per stage, decoded from the bitmask."""
+    bits = flags.to_numpy(dtype=np.uint8)
+    return pd.DataFrame({
+        "stage": list(STAGES),
+        "orders": [int(((bits >> np.uint8(i)) & 1).sum()) for i in range(len(STAGES))],
+    })
+
+
+def save_state(state: dict, path):
+    """Writes the detection state as a single pickle, atomically."""
+    tmp = path.with_suffix(".tmp")
+    pd.to_pickle(state, tmp)
+    tmp.replace(path)
+
+
+def load_state(path):
+    """Reads a state written by save_state(), or None if there is none."""
+    return pd.read_pickle(path) if path.exists() else None
@@ -0,0 +1,183 @@
+"""
+Process-wide, memory-budgeted cache for the per-dataset loaders.
+
+st.cache_data has per-function max_entries/ttl but no notion of total
+memory, so each additional dataset would add its full snapshot and
+aggregates indefinitely. This cache keeps every entry in one LRU shared by
+all datasets. It enforces max_entries per dataset and function, ttl, and a
+global byte budget (DC_CACHE_MAX_BYTES), and counts hits, misses and
+evictions per dataset namespace. Values larger than MAX_ENTRY_FRACTION of the budget are
+returned uncached (counted as rejected_oversize): keeping them would evict
+everything else and then be evicted by the next store.
+
+Values are returned as-is (not copied), so callers must not mutate them.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+from streamlit.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_BYTES = int(os.environ.get("DC_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+MAX_ENTRY_FRACTION = 0.5
+
+
+def sizeof(obj) -> int:
+    """Approximate memory footprint of a cached value, in bytes."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(sizeof(v) for v in obj.values()) + sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(sizeof(v) for v in obj) + sys.getsizeof(obj)
+    return sys.getsizeof(obj)
+
+
+class _Entry:
+    __slots__ = ("value", "nbytes", "created", "ttl")
+
+    def __init__(self, value, nbytes, ttl):
+        self.value = value
+        self.nbytes = nbytes
+        self.created = time.monotonic()
+        self.ttl = ttl
+
+    def expired(self, now) -> bool:
+        return self.ttl is not None and now - self.created > self.ttl
+
+
+class BudgetedCache:
+    """LRU keyed by (namespace, function, args) with a global byte budget."""
+
+    def __init__(self, max_bytes: int, max_entry_fraction: float = MAX_ENTRY_FRACTION):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = int(max_bytes * max_entry_fraction)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-key compute locks, reference counted so only in-flight keys are kept
+        self._key_locks = {}
+        self.nbytes = 0
+        self.stats = defaultdict(lambda: defaultdict(int))
+
+    def _drop(self, key, reason):
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+        self.stats[key[0]][f"evicted_{reason}"] += 1
+        logger.info("cache evict (%s) %s/%s: %.1f MB", reason, key[0], key[1], entry.nbytes / 1e6)
+
+    def lookup(self, key):
+        """Returns the live entry for `key` (counting a hit), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired(time.monotonic()):
+                self._drop(key, "ttl")
+                return None
+            self._entries.move_to_end(key)
+            self.stats[key[0]]["hits"] += 1
+            return entry
+
+    def _store(self, key, value, ttl, max_entries):
+        nbytes = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key, "replaced")
+            if nbytes > self.max_entry_bytes:
+                self.stats[key[0]]["rejected_oversize"] += 1
+                logger.warning("cache reject %s/%s: %.1f MB exceeds the per-entry limit of %.1f MB",
+                               key[0], key[1], nbytes / 1e6, self.max_entry_bytes / 1e6)
+                return
+            self._entries[key] = _Entry(value, nbytes, ttl)
+            self.nbytes += nbytes
+
+            # Entry limit per dataset and function
+            if max_entries is not None:
+                same_fn = [k for k in self._entries if k[:2] == key[:2]]
+                for old in same_fn[:-max_entries]:
+                    self._drop(old, "max_entries")
+
+            # Global budget: expired entries first, then least recently used
+            now = time.monotonic()
+            for old in [k for k, e in self._entries.items() if e.expired(now)]:
+                self._drop(old, "ttl")
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), "budget")
+
+    def put(self, key, value, ttl=None, max_entries=None):
+        """Stores a value computed elsewhere (e.g. as a by-product of another entry)."""
+        self._store(key, value, ttl, max_entries)
+
+    def get_or_compute(self, key, compute, ttl=None, max_entries=None):
+        entry = self.lookup(key)
+        if entry is not None:
+            return entry.value
+        # One computation per key; concurrent callers wait for it
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                entry = self.lookup(key)
+                if entry is not None:
+                    return entry.value
+                with self._lock:
+                    self.stats[key[0]]["misses"] += 1
+                value = compute()
+                self._store(key, value, ttl, max_entries)
+                return value
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+    def summary(self) -> pd.DataFrame:
+        """Entries, bytes, hits, misses and evictions per namespace."""
+        with self._lock:
+            rows = defaultdict(lambda: {"entries": 0, "bytes": 0})
+            for key, entry in self._entries.items():
+                rows[key[0]]["entries"] += 1
+                rows[key[0]]["bytes"] += entry.nbytes
+            for namespace, counters in self.stats.items():
+                rows[namespace].update(counters)
+        out = pd.DataFrame.from_dict(rows, orient="index").fillna(0)
+        return out.rename_axis("dataset").reset_index()
+
+
+CACHE = BudgetedCache(MAX_BYTES)
+
+
+def cached(ttl=None, max_entries=None):
+    """
+    Decorator for loaders whose first argument is the dataset name. The
+    dataset is the cache namespace; the remaining arguments form the key.
+    wrapper.prime(dataset, *args, value=...) stores a value for those
+    arguments without calling the loader.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(dataset, *args):
+            return CACHE.get_or_compute(
+                (dataset, fn.__name__, args), lambda: fn(dataset, *args),
+                ttl=ttl, max_entries=max_entries
+            )
+
+        def prime(dataset, *args, value):
+            CACHE.put((dataset, fn.__name__, args), value, ttl=ttl, max_entries=max_entries)
+
+        wrapper.prime = prime
+        return wrapper
+    return decorator
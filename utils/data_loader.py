@@ -1,53 +1,60 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import gdown
 import os
-import sys
+
+from utils import anomalies, sketches
+from utils.aggregations import AGGREGATES
+from utils.cache import cached
+from utils.datasets import get_dataset
+from utils.drivers import DRIVER_AGGREGATES, build_delivery_frame
 
 # Path Configuration
-# Navigates from /pages/ or /utils/ up to the root directory
-BASE_DIR = Path(__file__).resolve().parents[1]
-LOCAL_DATA_DIR = BASE_DIR / "data"
-CACHE_DATA_DIR = BASE_DIR / "data_cache"
+# Every dataset has its own data/, data_cache/ and artefacts/ directories,
+# see utils/datasets.py. Loaders take an optional dataset name and default
+# to the one selected in the current session.
 
-# Ensure the cache directory exists in the Streamlit environment
-CACHE_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# With DC_SERVE_PRECOMPUTED=1 the app reads the latest published artefact
+# version (`python -m utils.precompute`) instead of rebuilding the dataset
+# and aggregates on each cold start.
+SERVE_PRECOMPUTED = os.environ.get("DC_SERVE_PRECOMPUTED", "0") == "1"
 
 ENCODING = "latin-1"
 
-# Google Drive File IDs mapping
-GDRIVE_FILES = {
-    "orders.csv": "1_xETc5dummDrBqwStB0bVEgpJd8Y-kpl",
-    "stores.csv": "12m8cV5bgbilWfDGKD5l3Tungvmt3aq_D",
-    "hubs.csv": "1SPwz8GttbQjOP9JdqKhzeJv56KB1xSzy",
-    "deliveries.csv": "1z5ZpuXekP9Xy2Rw3mB7Cld3wC2M-vI2e",
-    "drivers.csv": "1EeecFK-4J4RzWXpAnz3eICpfvx0HEz63",
-    "payments.csv": "1KOHJII8tkk8kaXpCKbsEJLMXAz-ehh_w",
-    "channels.csv": "1xeU9ttngdzf-JOxEdn1MIzbhDiA7_bXn",
-}
+# Cache limits. The large raw CSVs are only needed to build the derived
+# frames, so they are read on demand and never cached; the small lookup
+# tables the pages read directly expire after RAW_TTL. Derived tables keep
+# two versions per dataset for rollovers.
+RAW_TTL = int(os.environ.get("DC_RAW_CACHE_TTL", 3600))
+VERSIONS_PER_DATASET = 2
 
-def _csv_path(name: str) -> Path:
+def _csv_path(name: str, dataset: str) -> Path:
     """
     Retrieves the local path of the CSV. 
     Downloads from Drive if missing, using a robust method to avoid 'NoneType' errors.
     """
+    ds = get_dataset(dataset)
+
     # 1. Check local /data folder (development mode)
-    p_local = LOCAL_DATA_DIR / name
+    p_local = ds.data_dir / name
     if p_local.exists():
         return p_local
 
     # 2. Check /data_cache folder (Streamlit Cloud mode)
-    p_cache = CACHE_DATA_DIR / name
+    ds.cache_dir.mkdir(parents=True, exist_ok=True)
+    p_cache = ds.cache_dir / name
     
     # Download if file doesn't exist or is empty (failed previous download)
     if not p_cache.exists() or p_cache.stat().st_size == 0:
-        file_id = GDRIVE_FILES.get(name)
+        file_id = ds.gdrive_files.get(name)
         
         if not file_id:
-            raise FileNotFoundError(f"No Google Drive ID mapped for {name}")
+            raise FileNotFoundError(f"No Google Drive ID mapped for {name} in dataset '{ds.name}'")
         
         try:
+            # Imported here: only needed on a cold cache, and it is slow to import
+            import gdown
+
             # Format as direct download link
             url = f'https://drive.google.com/uc?id={file_id}'
             
@@ -64,53 +71,73 @@ def _csv_path(name: str) -> Path:
         
     return p_cache
 
-def _read_csv(name: str) -> pd.DataFrame:
+def _read_csv(name: str, dataset: str) -> pd.DataFrame:
     """Reads CSV with the specific encoding required for this dataset."""
-    return pd.read_csv(_csv_path(name), encoding=ENCODING)
+    return pd.read_csv(_csv_path(name, dataset), encoding=ENCODING)
 
-# --- Data Loading Functions with Streamlit Cache ---
+def _name(dataset) -> str:
+    """Resolves None to the session's dataset, so it can be used as cache key."""
+    return get_dataset(dataset).name
 
-@st.cache_data
-def load_orders():
-    df = _read_csv("orders.csv")
+# --- Data Loading Functions ---
+
+def _orders(dataset):
+    df = _read_csv("orders.csv", dataset)
     # Pre-process dates immediately
     moment_cols = [c for c in df.columns if "order_moment" in c]
     for c in moment_cols:
         df[c] = pd.to_datetime(df[c], errors="coerce")
     return df
 
-@st.cache_data
-def load_stores(): return _read_csv("stores.csv")
+@cached(ttl=RAW_TTL)
+def _lookup_table(dataset, name):
+    return _read_csv(name, dataset)
+
+def _table(dataset, name):
+    return _read_csv(name, dataset)
 
-@st.cache_data
-def load_hubs(): return _read_csv("hubs.csv")
+def load_orders(dataset=None): return _orders(_name(dataset))
 
-@st.cache_data
-def load_deliveries(): return _read_csv("deliveries.csv")
+def load_stores(dataset=None): return _lookup_table(_name(dataset), "stores.csv")
 
-@st.cache_data
-def load_drivers(): return _read_csv("drivers.csv")
+def load_hubs(dataset=None): return _lookup_table(_name(dataset), "hubs.csv")
 
-@st.cache_data
-def load_payments(): return _read_csv("payments.csv")
+def load_deliveries(dataset=None): return _table(_name(dataset), "deliveries.csv")
 
-@st.cache_data
-def load_channels(): return _read_csv("channels.csv")
+def load_drivers(dataset=None): return _table(_name(dataset), "drivers.csv")
 
-@st.cache_data
-def load_full_dataset():
+def load_payments(dataset=None): return _table(_name(dataset), "payments.csv")
+
+def load_channels(dataset=None): return _table(_name(dataset), "channels.csv")
+
+def _raw_tables(dataset) -> dict:
+    return {
+        "orders": load_orders(dataset),
+        "stores": load_stores(dataset),
+        "hubs": load_hubs(dataset),
+        "channels": load_channels(dataset),
+        "deliveries": load_deliveries(dataset),
+        "drivers": load_drivers(dataset),
+        "payments": load_payments(dataset),
+    }
+
+def build_full_dataset(dataset=None):
     """
     Main Data Pipeline: Loads all CSVs and performs left joins to create 
     the master analytical dataframe.
     """
-    orders = load_orders()
-    stores = load_stores()
-    hubs = load_hubs()
-    channels = load_channels()
-    deliveries = load_deliveries()
-    drivers = load_drivers()
-    payments = load_payments()
+    return _join_tables(**_raw_tables(dataset))
+
+def build_source_frames(dataset=None):
+    """
+    Master dataframe and delivery frame from a single read of the CSVs, so
+    the orders, deliveries and drivers tables are only parsed once.
+    """
+    tables = _raw_tables(dataset)
+    delivery_frame = build_delivery_frame(tables["deliveries"], tables["orders"], tables["drivers"])
+    return _join_tables(**tables), delivery_frame
 
+def _join_tables(orders, stores, hubs, channels, deliveries, drivers, payments):
     # Core joins
     df = orders.merge(stores, on="store_id", how="left")
     df = df.merge(hubs, on="hub_id", how="left")
@@ -134,4 +161,119 @@ def load_full_dataset():
     )
     df = df.merge(deliveries_agg, left_on="delivery_order_id", right_on="delivery_order_id", how="left")
 
-    return df
\ No newline at end of file
+    return df
+
+# --- Precomputed Artefacts ---
+
+def latest_artefact_version(dataset=None):
+    """
+    Returns the version name of the latest published artefact directory,
+    or None when not serving precomputed data or nothing has been published.
+    """
+    if not SERVE_PRECOMPUTED:
+        return None
+    root = get_dataset(dataset).artefacts_dir
+    pointer = root / "LATEST"
+    if not pointer.exists():
+        return None
+    version = pointer.read_text().strip()
+    if not (root / version / "manifest.json").exists():
+        return None
+    return version
+
+def _artefact(dataset, version, *parts) -> Path:
+    return get_dataset(dataset).artefacts_dir / version / Path(*parts)
+
+# Derived tables are cached per (dataset, version), so a nightly publish is
+# picked up without restarting the app and datasets never share entries.
+
+@cached(max_entries=VERSIONS_PER_DATASET)
+def _full_dataset(dataset, version):
+    if version is not None:
+        return pd.read_pickle(_artefact(dataset, version, "snapshot.pkl"))
+    # Built together with the delivery frame, which is cached alongside
+    df, delivery_frame = build_source_frames(dataset)
+    _delivery_frame.prime(dataset, version, value=delivery_frame)
+    return df
+
+def load_full_dataset(dataset=None):
+    """
+    Master dataframe: the precomputed snapshot when serving artefacts,
+    otherwise built from the CSVs.
+    """
+    dataset = _name(dataset)
+    return _full_dataset(dataset, latest_artefact_version(dataset))
+
+@cached(max_entries=VERSIONS_PER_DATASET)
+def _delivery_frame(dataset, version):
+    if version is not None:
+        return pd.read_pickle(_artefact(dataset, version, "deliveries.pkl"))
+    df, delivery_frame = build_source_frames(dataset)
+    _full_dataset.prime(dataset, version, value=df)
+    return delivery_frame
+
+def load_delivery_frame(dataset=None):
+    """Delivery-level frame (delivery × order × driver) used by the driver metrics."""
+    dataset = _name(dataset)
+    return _delivery_frame(dataset, latest_artefact_version(dataset))
+
+@cached(max_entries=VERSIONS_PER_DATASET * len(AGGREGATES))
+def _aggregate(dataset, name, version):
+    if version is not None:
+        path = _artefact(dataset, version, "aggregates", f"{name}.pkl")
+        if path.exists():
+            return pd.read_pickle(path)
+    return AGGREGATES[name](load_full_dataset(dataset))
+
+def load_aggregate(name: str, dataset=None) -> pd.DataFrame:
+    """
+    Returns one of the tables registered in utils.aggregations.AGGREGATES,
+    read from the artefact directory when available, computed otherwise.
+    """
+    dataset = _name(dataset)
+    return _aggregate(dataset, name, latest_artefact_version(dataset))
+
+@cached(max_entries=VERSIONS_PER_DATASET * len(DRIVER_AGGREGATES))
+def _driver_aggregate(dataset, name, version):
+    if version is not None:
+        path = _artefact(dataset, version, "aggregates", f"{name}.pkl")
+        if path.exists():
+            return pd.read_pickle(path)
+    return DRIVER_AGGREGATES[name](load_delivery_frame(dataset))
+
+def load_driver_aggregate(name: str, dataset=None) -> pd.DataFrame:
+    """Same as load_aggregate, for the tables in utils.drivers.DRIVER_AGGREGATES."""
+    dataset = _name(dataset)
+    return _driver_aggregate(dataset, name, latest_artefact_version(dataset))
+
+@cached(max_entries=VERSIONS_PER_DATASET)
+def _anomalies(dataset, version):
+    if version is not None:
+        state = anomalies.load_state(_artefact(dataset, version, "anomalies.pkl"))
+        if state is not None:
+            return state
+    return anomalies.detect(load_full_dataset(dataset))
+
+def load_anomalies(dataset=None) -> dict:
+    """
+    Anomaly detection state (flagged orders, flagged hub-hours, scored ids),
+    from the artefact directory when available, computed otherwise.
+    """
+    dataset = _name(dataset)
+    return _anomalies(dataset, latest_artefact_version(dataset))
+
+@cached(max_entries=VERSIONS_PER_DATASET)
+def _sketch_cube(dataset, version):
+    if version is not None:
+        path = _artefact(dataset, version, "sketches.pkl")
+        if path.exists():
+            return pd.read_pickle(path)
+    return sketches.build_cube(load_full_dataset(dataset))
+
+def load_sketch_cube(dataset=None) -> dict:
+    """
+    HyperLogLog cube for distinct counts under the KPI filters, from the
+    artefact directory when available, built otherwise.
+    """
+    dataset = _name(dataset)
+    return _sketch_cube(dataset, latest_artefact_version(dataset))
@@ -0,0 +1,117 @@
+"""
+Registry of the datasets this deployment can serve.
+
+Without configuration there is a single dataset, "brazil", stored where
+it always was (data/, data_cache/, artefacts/). More datasets are declared
+in a JSON file (datasets.json at the project root, or DC_DATASETS_FILE):
+
+    {
+        "brazil": {"label": "Brazil"},
+        "mexico": {
+            "label": "Mexico",
+            "gdrive_files": {"orders.csv": "<drive id>", ...}
+        }
+    }
+
+Any entry may override data_dir, cache_dir and artefacts_dir. Otherwise
+non-default datasets live in data/<name>/, data_cache/<name>/ and
+artefacts/<name>/, so snapshots, aggregates and caches never mix.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATASETS_FILE = Path(os.environ.get("DC_DATASETS_FILE", BASE_DIR / "datasets.json"))
+
+DEFAULT_DATASET = "brazil"
+
+# Google Drive File IDs mapping of the default dataset
+GDRIVE_FILES = {
+    "orders.csv": "1_xETc5dummDrBqwStB0bVEgpJd8Y-kpl",
+    "stores.csv": "12m8cV5bgbilWfDGKD5l3Tungvmt3aq_D",
+    "hubs.csv": "1SPwz8GttbQjOP9JdqKhzeJv56KB1xSzy",
+    "deliveries.csv": "1z5ZpuXekP9Xy2Rw3mB7Cld3wC2M-vI2e",
+    "drivers.csv": "1EeecFK-4J4RzWXpAnz3eICpfvx0HEz63",
+    "payments.csv": "1KOHJII8tkk8kaXpCKbsEJLMXAz-ehh_w",
+    "channels.csv": "1xeU9ttngdzf-JOxEdn1MIzbhDiA7_bXn",
+}
+
+# Session key holding the selected dataset (not a widget key, so it
+# survives page switches)
+SESSION_KEY = "dc_dataset"
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    label: str
+    data_dir: Path
+    cache_dir: Path
+    artefacts_dir: Path
+    gdrive_files: dict = field(default_factory=dict)
+
+
+def _dataset(name: str, spec: dict) -> Dataset:
+    default = name == DEFAULT_DATASET
+    # Artefacts honour DC_ARTEFACTS_DIR as the root for every dataset
+    artefacts_root = Path(os.environ.get("DC_ARTEFACTS_DIR", BASE_DIR / "artefacts"))
+    return Dataset(
+        name=name,
+        label=spec.get("label", name.title()),
+        data_dir=Path(spec.get("data_dir", BASE_DIR / "data" if default else BASE_DIR / "data" / name)),
+        cache_dir=Path(spec.get("cache_dir", BASE_DIR / "data_cache" if default else BASE_DIR / "data_cache" / name)),
+        artefacts_dir=Path(spec.get("artefacts_dir", artefacts_root if default else artefacts_root / name)),
+        gdrive_files=spec.get("gdrive_files", GDRIVE_FILES if default else {}),
+    )
+
+
+def _load_registry() -> dict:
+    specs = json.loads(DATASETS_FILE.read_text()) if DATASETS_FILE.exists() else {}
+    specs = specs or {DEFAULT_DATASET: {}}
+    return {name: _dataset(name, spec) for name, spec in specs.items()}
+
+
+DATASETS = _load_registry()
+
+
+def default_dataset() -> str:
+    return DEFAULT_DATASET if DEFAULT_DATASET in DATASETS else next(iter(DATASETS))
+
+
+def get_dataset(name: str = None) -> Dataset:
+    """Dataset by name; the session's dataset when name is None."""
+    name = name or current_dataset()
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset '{name}'. Configured: {', '.join(DATASETS)}")
+    return DATASETS[name]
+
+
+def current_dataset() -> str:
+    """
+    Dataset selected in this session. Outside a script run (background
+    threads, the precompute CLI) this is the default dataset.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return default_dataset()
+    name = st.session_state.get(SESSION_KEY)
+    return name if name in DATASETS else default_dataset()
+
+
+def dataset_selector():
+    """Sidebar selector for the session's dataset. Hidden with a single dataset."""
+    if len(DATASETS) < 2:
+        return current_dataset()
+    names = list(DATASETS)
+    selected = st.sidebar.selectbox(
+        "Dataset",
+        names,
+        index=names.index(current_dataset()),
+        format_func=lambda n: DATASETS[n].label,
+    )
+    st.session_state[SESSION_KEY] = selected
+    return selected
@@ -0,0 +1,132 @@
+"""
+Driver and vehicle efficiency metrics.
+
+Works on the delivery level (one row per delivery, joined to its order and
+driver) rather than on the master dataframe, which only keeps the first
+driver of each order. All metrics are computed with grouped sums in one
+pass, so the cost grows linearly with deliveries and not with drivers.
+
+Definitions
+- speed_kmh: total distance / total transit time (distance-weighted)
+- active_hours: distinct clock hours in which the driver made a delivery
+- deliveries_per_hour: deliveries / active_hours
+- utilisation: transit hours / active_hours, capped at 1
+
+An order's transit time is split evenly across its deliveries, so orders
+with several deliveries are not counted more than once.
+"""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+# Order columns needed from orders.csv
+ORDER_COLUMNS = ["delivery_order_id", "order_moment_created", "order_metric_transit_time"]
+
+METRICS = {
+    "speed_kmh": "Speed (km/h)",
+    "deliveries_per_hour": "Deliveries per active hour",
+    "utilisation": "Utilisation",
+    "deliveries": "Deliveries",
+    "distance_km": "Distance (km)",
+}
+
+
+def build_delivery_frame(deliveries: pd.DataFrame, orders: pd.DataFrame, drivers: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per delivery with a positive distance and transit time, carrying
+    the driver, vehicle, order creation time and the hour window it falls in.
+    """
+    frame = deliveries.merge(drivers, on="driver_id", how="left").merge(
+        orders[ORDER_COLUMNS], on="delivery_order_id", how="inner"
+    )
+    frame = frame[
+        frame["driver_id"].notna()
+        & (frame["delivery_distance_meters"] > 0)
+        & (frame["order_metric_transit_time"] > 0)
+    ]
+    deliveries_per_order = frame.groupby("delivery_order_id")["delivery_order_id"].transform("size")
+    return pd.DataFrame({
+        "driver_id": frame["driver_id"].astype("int64"),
+        "driver_modal": frame["driver_modal"].fillna("unknown"),
+        "created": frame["order_moment_created"],
+        "hour": frame["order_moment_created"].dt.floor("h"),
+        "distance_km": frame["delivery_distance_meters"].to_numpy() / 1000.0,
+        "transit_h": frame["order_metric_transit_time"].to_numpy() / 60.0 / deliveries_per_order.to_numpy(),
+    }).dropna(subset=["hour"]).reset_index(drop=True)
+
+
+def _derive(out: pd.DataFrame) -> pd.DataFrame:
+    """Adds the ratio metrics to a table of summed distance/transit/hours."""
+    out["speed_kmh"] = out["distance_km"] / out["transit_h"]
+    out["deliveries_per_hour"] = out["deliveries"] / out["active_hours"]
+    out["utilisation"] = np.minimum(out["transit_h"] / out["active_hours"], 1.0)
+    return out
+
+
+def efficiency_by(frame: pd.DataFrame, keys) -> pd.DataFrame:
+    """Efficiency metrics grouped by `keys` (e.g. driver, vehicle, vehicle × day)."""
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    out = frame.groupby(keys, observed=True).agg(
+        deliveries=("distance_km", "size"),
+        distance_km=("distance_km", "sum"),
+        transit_h=("transit_h", "sum"),
+    )
+    # Active hours: distinct (group, hour) pairs. Dropping duplicates first
+    # keeps this a single vectorized count instead of a per-group nunique.
+    hours_keys = list(dict.fromkeys(keys + ["driver_id", "hour"]))
+    active = frame[hours_keys].drop_duplicates().groupby(keys, observed=True).size()
+    out["active_hours"] = active.reindex(out.index).to_numpy()
+    return _derive(out.reset_index())
+
+
+def driver_efficiency(frame: pd.DataFrame) -> pd.DataFrame:
+    """Per-driver metrics, with each driver's vehicle type."""
+    return efficiency_by(frame, ["driver_id", "driver_modal"])
+
+
+def modal_efficiency(frame: pd.DataFrame) -> pd.DataFrame:
+    """Per-vehicle metrics. Active hours are counted per driver and summed."""
+    return efficiency_by(frame, "driver_modal")
+
+
+def modal_efficiency_over_time(frame: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """Per-vehicle metrics for each time window of size `freq` ("h", "D", "W"...)."""
+    windowed = frame.assign(window=frame["created"].dt.to_period(freq).dt.start_time)
+    return efficiency_by(windowed, ["window", "driver_modal"])
+
+
+def driver_efficiency_over_time(frame: pd.DataFrame, freq: str = "W") -> pd.DataFrame:
+    """Per-driver metrics for each time window of size `freq`."""
+    windowed = frame.assign(window=frame["created"].dt.to_period(freq).dt.start_time)
+    return efficiency_by(windowed, ["window", "driver_id", "driver_modal"])
+
+
+def top_n(table: pd.DataFrame, metric: str, n: int = 10, largest: bool = True,
+          min_deliveries: int = 0) -> pd.DataFrame:
+    """
+    Top `n` rows of `table` by `metric`. Uses argpartition so only the
+    selected rows get sorted, which matters with tens of thousands of drivers.
+    """
+    if min_deliveries:
+        table = table[table["deliveries"] >= min_deliveries]
+    values = table[metric].to_numpy(dtype="float64")
+    values = np.where(np.isnan(values), -np.inf if largest else np.inf, values)
+    if largest:
+        values = -values
+    n = min(n, len(values))
+    if n == 0:
+        return table.iloc[:0]
+    idx = np.argpartition(values, n - 1)[:n] if n < len(values) else np.arange(len(values))
+    idx = idx[np.argsort(values[idx], kind="stable")]
+    return table.iloc[idx].reset_index(drop=True)
+
+
+# Name -> builder over the delivery frame. Names double as artefact file names.
+DRIVER_AGGREGATES = {
+    "drivers_by_driver": driver_efficiency,
+    "drivers_by_modal": modal_efficiency,
+    "drivers_by_modal_daily": partial(modal_efficiency_over_time, freq="D"),
+    "drivers_by_modal_weekly": partial(modal_efficiency_over_time, freq="W"),
+    "drivers_by_driver_weekly": partial(driver_efficiency_over_time, freq="W"),
+}
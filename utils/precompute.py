@@ -0,0 +1,200 @@
+"""
+Offline pipeline: builds the master snapshot and every registered aggregate
+table in one run and publishes them as a versioned artefact directory.
+
+    python -m utils.precompute [--dataset NAME ...] [--out DIR] [--workers N] [--keep 3] [--rescore]
+
+Every configured dataset is processed unless --dataset is given. Each one
+publishes under its own artefact root (see utils/datasets.py); layout of a
+published version:
+
+    artefacts/
+        LATEST                      <- name of the newest version
+        20261019T020000Z/
+            manifest.json
+            snapshot.pkl
+            deliveries.pkl
+            anomalies.pkl           <- detection state, resumed by the next run
+            sketches.pkl            <- distinct-count cube for the KPI filters
+            aggregates/<name>.pkl
+
+Start the app with DC_SERVE_PRECOMPUTED=1 to serve these files instead of
+computing at request time.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import anomalies, sketches
+from utils.aggregations import AGGREGATES
+from utils.data_loader import build_source_frames
+from utils.datasets import DATASETS, get_dataset
+from utils.drivers import DRIVER_AGGREGATES
+
+# Source frame -> registry of aggregates built from it
+SOURCES = {
+    "snapshot": AGGREGATES,
+    "deliveries": DRIVER_AGGREGATES,
+}
+
+# Source frames shared by the worker processes. The parent fills this before
+# the pool starts, so forked workers inherit the frames copy-on-write.
+_WORKER_FRAMES = {}
+
+# Fork where the platform has it (Python 3.14 no longer defaults to it on Linux)
+_MP_CONTEXT = multiprocessing.get_context(
+    "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+)
+
+
+def _init_worker(staging: str):
+    # Only start methods that do not fork (spawn, forkserver) re-read them
+    for source in SOURCES:
+        if source not in _WORKER_FRAMES:
+            _WORKER_FRAMES[source] = pd.read_pickle(Path(staging) / f"{source}.pkl")
+
+
+def _build_aggregate(source: str, name: str, out_dir: str):
+    """Computes one aggregate in a worker and writes it next to the snapshot."""
+    start = time.perf_counter()
+    table = SOURCES[source][name](_WORKER_FRAMES[source])
+    table.to_pickle(Path(out_dir) / f"{name}.pkl")
+    return name, len(table), time.perf_counter() - start
+
+
+def _prune(root: Path, keep: int):
+    """Removes all but the `keep` most recent published versions."""
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and (p / "manifest.json").exists())
+    for old in versions[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _previous_anomaly_state(out_root: Path):
+    """Detection state of the currently published version, if any."""
+    pointer = out_root / "LATEST"
+    if not pointer.exists():
+        return None
+    return anomalies.load_state(out_root / pointer.read_text().strip() / "anomalies.pkl")
+
+
+def run(dataset: str, out_root: Path, workers: int, keep: int, rescore: bool = False) -> Path:
+    """Builds and publishes a new artefact version of `dataset`. Returns its directory."""
+    out_root.mkdir(parents=True, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    staging = out_root / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    (staging / "aggregates").mkdir(parents=True)
+
+    # 1. Source frames
+    start = time.perf_counter()
+    df, deliveries = build_source_frames(dataset)
+    df.to_pickle(staging / "snapshot.pkl")
+    deliveries.to_pickle(staging / "deliveries.pkl")
+    print(
+        f"snapshot: {len(df):,} rows, deliveries: {len(deliveries):,} rows "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    # 2. Aggregates, fanned out across processes. The main process builds
+    # the stateful artefacts (anomalies, sketches) while the workers run.
+    tables = {}
+    tasks = [(source, name) for source, registry in SOURCES.items() for name in registry]
+    _WORKER_FRAMES.update(snapshot=df, deliveries=deliveries)
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(tasks))), mp_context=_MP_CONTEXT,
+        initializer=_init_worker, initargs=(str(staging),)
+    ) as pool:
+        futures = [
+            pool.submit(_build_aggregate, source, name, str(staging / "aggregates"))
+            for source, name in tasks
+        ]
+
+        # Anomaly detection, resuming from the previous version
+        start = time.perf_counter()
+        previous = None if rescore else _previous_anomaly_state(out_root)
+        state = anomalies.update(df, previous)
+        anomalies.save_state(state, staging / "anomalies.pkl")
+        print(
+            f"anomalies: {len(state['orders']):,} orders, {len(state['hub_hours']):,} hub-hours flagged "
+            f"({'incremental' if previous is not None else 'full'}) in {time.perf_counter() - start:.1f}s"
+        )
+
+        # Distinct-count sketches
+        start = time.perf_counter()
+        cube = sketches.build_cube(df)
+        pd.to_pickle(cube, staging / "sketches.pkl")
+        print(f"sketches: {len(cube['cells']):,} cells in {time.perf_counter() - start:.1f}s")
+
+        for fut in as_completed(futures):
+            name, rows, elapsed = fut.result()
+            tables[name] = rows
+            print(f"  {name}: {rows:,} rows in {elapsed:.2f}s")
+    _WORKER_FRAMES.clear()
+
+    # 3. Manifest, then publish atomically
+    manifest = {
+        "dataset": dataset,
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "snapshot_rows": len(df),
+        "delivery_rows": len(deliveries),
+        "aggregates": dict(sorted(tables.items())),
+        "anomalies": {
+            "flagged_orders": len(state["orders"]),
+            "flagged_hub_hours": len(state["hub_hours"]),
+            "incremental": previous is not None,
+        },
+        "sketch_cells": len(cube["cells"]),
+    }
+    (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    final = out_root / version
+    staging.rename(final)
+    pointer_tmp = out_root / "LATEST.tmp"
+    pointer_tmp.write_text(version)
+    pointer_tmp.replace(out_root / "LATEST")
+
+    _prune(out_root, keep)
+    return final
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute dashboard artefacts.")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS),
+                        help="Dataset to process, repeatable (default: all configured)")
+    parser.add_argument("--out", type=Path,
+                        help="Artefact root directory, only with a single --dataset "
+                             "(default: the dataset's artefacts_dir)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes for aggregates, capped at the number of "
+                             "aggregates (default: all cores)")
+    parser.add_argument("--keep", type=int, default=3,
+                        help="Number of published versions to retain")
+    parser.add_argument("--rescore", action="store_true",
+                        help="Rerun anomaly detection from scratch instead of incrementally")
+    args = parser.parse_args(argv)
+
+    datasets = args.dataset or list(DATASETS)
+    if args.out is not None and len(datasets) != 1:
+        parser.error("--out requires exactly one --dataset")
+
+    for dataset in datasets:
+        start = time.perf_counter()
+        out_root = args.out or get_dataset(dataset).artefacts_dir
+        print(f"[{dataset}]")
+        final = run(dataset, out_root, args.workers, max(1, args.keep), args.rescore)
+        print(f"published {final} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Background computation of page sections.
+
+Pages submit each section's aggregation to a thread pool shared by every
+session, then render the sections as their results arrive instead of
+computing them one after another. Finished results are stored in the
+process-wide byte-budgeted cache (utils/cache.py) under the dataset's
+namespace, keyed by page, data version, filter state and section, so
+reruns and other sessions with the same filters reuse them and they count
+towards DC_CACHE_MAX_BYTES and the cache metrics. In-flight work is shared
+the same way until it finishes.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+from utils.cache import CACHE
+
+MAX_WORKERS = int(os.environ.get("DC_SECTION_WORKERS", min(8, os.cpu_count() or 1)))
+MAX_ENTRIES = int(os.environ.get("DC_SECTION_CACHE_ENTRIES", 256))
+
+
+class SectionScheduler:
+    """Thread pool whose results are memoised in a BudgetedCache."""
+
+    def __init__(self, max_workers: int, max_entries: int, cache=CACHE):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dc-section")
+        self._cache = cache
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def submit(self, dataset: str, key, fn, *args, memoise: bool = True) -> Future:
+        """
+        Returns a future for fn(*args), reusing a cached result or in-flight
+        future for `key`. Pass memoise=False when fn already caches its own
+        result (e.g. load_aggregate), so it is not counted twice.
+        """
+        cache_key = (dataset, "section", key)
+        with self._lock:
+            entry = self._cache.lookup(cache_key) if memoise else None
+            if entry is not None:
+                fut = Future()
+                fut.set_result(entry.value)
+                return fut
+            fut = self._pending.get(cache_key)
+            if fut is not None:
+                return fut
+
+            if memoise:
+                task = lambda: self._cache.get_or_compute(
+                    cache_key, lambda: fn(*args), max_entries=self.max_entries
+                )
+            else:
+                task = lambda: fn(*args)
+            fut = self._pool.submit(task)
+            self._pending[cache_key] = fut
+        # Failed results are not cached, the next rerun retries them
+        fut.add_done_callback(lambda _: self._forget(cache_key))
+        return fut
+
+    def _forget(self, cache_key):
+        with self._lock:
+            self._pending.pop(cache_key, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_scheduler() -> SectionScheduler:
+    """Scheduler shared by every session of this server process."""
+    return SectionScheduler(MAX_WORKERS, MAX_ENTRIES)
+
+
+def render_as_completed(sections: dict):
+    """
+    Renders sections in completion order. `sections` maps a name to
+    (future, placeholder, render), where placeholder is an st.empty() laid
+    out in display order and render(result) draws the section into it.
+    Sections still running show a spinner text until they are ready.
+    """
+    for fut, placeholder, _ in sections.values():
+        if not fut.done():
+            placeholder.caption("⏳ Computing…")
+
+    by_future = {}
+    for name, (fut, _, _) in sections.items():
+        by_future.setdefault(fut, []).append(name)
+
+    for fut in as_completed(by_future):
+        for name in by_future[fut]:
+            _, placeholder, render = sections[name]
+            with placeholder.container():
+                render(fut.result())
@@ -0,0 +1,104 @@
+"""
+Mergeable distinct-count sketches (HyperLogLog) for the KPI filters.
+
+A cube splits the dataset into cells (one per combination of the filter
+dimensions plus year and month). For every id column each cell keeps a
+sparse HLL register set: (cell, register, rank) rows, max-reduced. Any
+filter combination is answered by selecting its cells and merging their
+registers with an element-wise max, so nothing is rehashed at query time.
+
+With precision P = 14 the standard error is about 1.04 / sqrt(2**14) ≈ 0.8%.
+"""
+import numpy as np
+import pandas as pd
+
+P = 14
+M = 1 << P
+
+# Filter dimensions on the KPIs page + the time grain of the monthly chart
+CUBE_DIMS = ["hub_city", "channel_name", "store_segment", "order_created_year", "order_created_month"]
+CUBE_IDS = ["order_id", "store_id", "hub_id"]
+
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+
+
+def _registers(values: np.ndarray):
+    """HLL register index and rank for each value (64-bit hash)."""
+    h = pd.util.hash_array(values)
+    idx = (h >> np.uint64(64 - P)).astype(np.uint16)
+    w = h << np.uint64(P)
+    # Count leading zeros on two exact 32-bit halves (float64 holds them exactly)
+    hi = (w >> np.uint64(32)).astype(np.float64)
+    lo = (w & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        clz = np.where(
+            hi > 0,
+            31 - np.floor(np.log2(hi)),
+            np.where(lo > 0, 63 - np.floor(np.log2(lo)), 64),
+        )
+    rank = np.minimum(clz + 1, 64 - P + 1).astype(np.uint8)
+    return idx, rank
+
+
+def build_cube(df: pd.DataFrame, dims=CUBE_DIMS, ids=CUBE_IDS) -> dict:
+    """Builds the cell table and one sparse register table per id column."""
+    cell = df.groupby(dims, dropna=False, sort=False).ngroup().to_numpy()
+    cells = df[dims].assign(cell=cell).drop_duplicates("cell").set_index("cell").sort_index()
+
+    registers = {}
+    for col in ids:
+        present = df[col].notna().to_numpy()
+        idx, rank = _registers(df[col].to_numpy()[present])
+        registers[col] = (
+            pd.DataFrame({"cell": cell[present].astype(np.int32), "idx": idx, "rank": rank})
+            .groupby(["cell", "idx"], sort=False)["rank"].max()
+            .reset_index()
+        )
+    return {"dims": list(dims), "cells": cells, "registers": registers}
+
+
+def _estimate(regs: np.ndarray) -> np.ndarray:
+    """HLL estimate for each row of a (groups, M) register matrix."""
+    raw = _ALPHA * M * M / np.exp2(-regs.astype(np.float64)).sum(axis=1)
+    zeros = (regs == 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        linear = M * np.log(M / np.maximum(zeros, 1))
+    # Small-range correction (linear counting) while registers are still empty
+    return np.where((raw <= 2.5 * M) & (zeros > 0), linear, raw)
+
+
+def _select_cells(cube: dict, filters: dict) -> pd.DataFrame:
+    cells = cube["cells"]
+    mask = np.ones(len(cells), dtype=bool)
+    for dim, value in filters.items():
+        mask &= (cells[dim] == value).to_numpy()
+    return cells[mask]
+
+
+def count_distinct_by(cube: dict, col: str, by=(), **filters) -> pd.Series:
+    """
+    Approximate distinct count of `col` per combination of the `by`
+    dimensions, over the cells matching `filters` (dimension=value).
+    """
+    by = list(by)
+    cells = _select_cells(cube, filters)
+    if by:
+        groups = cells.groupby(by, sort=True, dropna=False).ngroup()
+        keys = cells[by].assign(g=groups.to_numpy()).drop_duplicates("g").set_index("g").sort_index()
+        index = pd.MultiIndex.from_frame(keys) if len(by) > 1 else pd.Index(keys[by[0]])
+    else:
+        groups = pd.Series(0, index=cells.index)
+        index = pd.Index([0])
+
+    regs = cube["registers"][col]
+    regs = regs[regs["cell"].isin(cells.index)]
+    g = groups.reindex(regs["cell"]).to_numpy()
+
+    dense = np.zeros((len(index), M), dtype=np.uint8)
+    np.maximum.at(dense, (g, regs["idx"].to_numpy()), regs["rank"].to_numpy())
+    return pd.Series(np.rint(_estimate(dense)).astype(np.int64), index=index, name=col)
+
+
+def count_distinct(cube: dict, col: str, **filters) -> int:
+    """Approximate distinct count of `col` over the cells matching `filters`."""
+    return int(count_distinct_by(cube, col, **filters).iloc[0])
@@ -0,0 +1,123 @@
+"""
+Background warm-up: imports the heavy plotting modules and fills the data
+caches in a daemon thread as soon as the server renders the landing page,
+so the first page a user opens finds everything already loaded.
+
+Disable with DC_WARMUP=0.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+import streamlit as st
+from streamlit.logger import get_logger
+
+from utils.aggregations import AGGREGATES
+from utils.data_loader import (
+    load_aggregate, load_anomalies, load_driver_aggregate, load_full_dataset, load_sketch_cube,
+)
+from utils.drivers import DRIVER_AGGREGATES
+
+logger = get_logger(__name__)
+
+WARMUP_ENABLED = os.environ.get("DC_WARMUP", "1") == "1"
+
+# Plotting modules imported by the pages (plotly.express by every chart page,
+# folium only by Geospatial); loading them here keeps them off the first page
+# view, and timed_import() logs what each one actually costs
+HEAVY_MODULES = ("plotly.express", "folium", "streamlit_folium")
+
+
+def timed_import(name: str):
+    """Imports a module and logs how long it took on first import."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    logger.info("import %s: %.0f ms", name, (time.perf_counter() - start) * 1000)
+    return module
+
+
+class WarmupState:
+    """Progress of the warm-up thread, shared by every session."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.done = 0
+        self.current = None
+        self.error = None
+        self.finished = False
+        self.elapsed = 0.0
+
+    @property
+    def progress(self) -> float:
+        return self.done / len(self.steps) if self.steps else 1.0
+
+
+def _steps(dataset: str):
+    # Background threads have no session, so the dataset is always explicit
+    steps = [(f"Importing {name}", lambda name=name: timed_import(name)) for name in HEAVY_MODULES]
+    steps.append(("Loading dataset", lambda: load_full_dataset(dataset)))
+    steps += [(f"Computing {name}", lambda name=name: load_aggregate(name, dataset)) for name in AGGREGATES]
+    steps += [(f"Computing {name}", lambda name=name: load_driver_aggregate(name, dataset))
+              for name in DRIVER_AGGREGATES]
+    steps.append(("Detecting anomalies", lambda: load_anomalies(dataset)))
+    steps.append(("Building distinct-count sketches", lambda: load_sketch_cube(dataset)))
+    return steps
+
+
+def _run(state: WarmupState, steps, dataset: str):
+    start = time.perf_counter()
+    try:
+        for label, step in steps:
+            state.current = label
+            step_start = time.perf_counter()
+            step()
+            logger.info("warm-up [%s] %s: %.0f ms", dataset, label, (time.perf_counter() - step_start) * 1000)
+            state.done += 1
+    except Exception as e:
+        # Pages fall back to loading synchronously and will surface the error
+        state.error = f"{state.current}: {e}"
+        logger.exception("warm-up [%s] failed at %s", dataset, state.current)
+    finally:
+        state.elapsed = time.perf_counter() - start
+        state.current = None
+        state.finished = True
+        logger.info("warm-up [%s] finished in %.1fs", dataset, state.elapsed)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(dataset: str) -> WarmupState:
+    """
+    Starts the warm-up thread for `dataset` once per server process and
+    returns its state. Later calls (any session, any page) return the same
+    state object.
+    """
+    steps = _steps(dataset) if WARMUP_ENABLED else []
+    state = WarmupState(label for label, _ in steps)
+    if not steps:
+        state.finished = True
+        return state
+    threading.Thread(
+        target=_run, args=(state, steps, dataset), name=f"dc-warmup-{dataset}", daemon=True
+    ).start()
+    return state
+
+
+def warmup_status(dataset: str):
+    """Shows warm-up progress, refreshing every second until it completes."""
+    state = start_warmup(dataset)
+    if state.finished:
+        if state.error:
+            st.caption(f"⚠️ Background warm-up stopped ({state.error}); pages will load on demand.")
+        return
+
+    @st.fragment(run_every=1.0)
+    def _status():
+        if state.finished:
+            st.rerun()
+        st.progress(state.progress, text=f"Preparing data · {state.current or 'starting'}…")
+
+    _status()